@@ -99,6 +99,8 @@ class GtpPlayer:
         'play',
         'genmove',
         'showboard',
+        'time_settings',
+        'time_left',
     ]
 
     def __init__(self, player, fin, fout):
@@ -175,6 +177,25 @@ class GtpPlayer:
                 except:
                     message = 'invalid color'
                     error = True
+            elif command == 'time_settings':
+                try:
+                    main_time = float(args[0])
+                    byo_yomi_time = float(args[1])
+                    byo_yomi_stones = int(args[2])
+                    self.player.set_time_settings(main_time, byo_yomi_time,
+                                                  byo_yomi_stones)
+                except (IndexError, ValueError):
+                    message = 'syntax error'
+                    error = True
+            elif command == 'time_left':
+                try:
+                    color = gtp_color(args[0])
+                    time_left = float(args[1])
+                    stones_left = int(args[2])
+                    self.player.set_time_left(color, time_left, stones_left)
+                except (IndexError, ValueError):
+                    message = 'syntax error'
+                    error = True
             elif command == 'showboard':
                 message = '\n' + self.player.show_board()
             elif command not in self.__commands__:
@@ -187,4 +208,5 @@ class GtpPlayer:
             self.fout.flush()
 
             if command == 'quit':
+                self.player.close()
                 break
@@ -1,14 +1,18 @@
 from uiki.mcts import *
 
 class AtariMCTS(MCTS):
-    def __init__(self, num_sims, score_func, exp_const, num_caps):
-        super(AtariMCTS, self).__init__(num_sims, score_func, exp_const)
+    def __init__(self, num_sims, score_func, exp_const, num_caps, threads=1,
+                 early_stop=False, stop_bound=None, rave=0, table_size=0,
+                 max_nodes=0, widening=0, cache=None):
+        super(AtariMCTS, self).__init__(num_sims, score_func, exp_const,
+                                        threads, early_stop, stop_bound, rave,
+                                        table_size, max_nodes, widening, cache)
         self.num_caps = num_caps
 
     def place_move(self, board, color, move, visited):
         oppcolor = opponent(color)
         board.place(color, move[0], move[1])
-        state = board.get_state()
+        state = board.get_hash()
         if state in visited:
             outcome = self.repeat_outcome(color)
         elif board.captures[color] >= self.num_caps:
@@ -20,5 +24,8 @@ class AtariMCTS(MCTS):
             outcome = None
         return outcome
 
+    def final_score(self, board):
+        return board.score(self.root_color)
+
     def win_outcome(self, color):
-        return 1 if color==self.root.color else -1
+        return 1 if color==self.root_color else -1
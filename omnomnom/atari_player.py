@@ -1,27 +1,61 @@
+import time
+
 from util.const import *
 from util.board import *
 from uiki.player import *
 
 from .atari_mcts import *
+from .solver import *
+
+# share of the time for a move that the capture solver may use
+SOLVER_SHARE = 0.25
 
 class AtariPlayer(Player):
     __name__ = 'omnomnom'
     __version__ = '0.2'
 
-    def __init__(self, playouts=1000):
-        super(AtariPlayer, self).__init__(playouts)
+    def __init__(self, playouts=1000, board_class=Board, workers=1, threads=1,
+                 ponder=False, early_stop=False, stop_bound=None, rave=0,
+                 table_size=0, max_nodes=0, widening=0, solver_nodes=5000,
+                 cache=None):
+        super(AtariPlayer, self).__init__(playouts, board_class,
+                                          workers=workers, threads=threads,
+                                          ponder=ponder, early_stop=early_stop,
+                                          stop_bound=stop_bound, rave=rave,
+                                          table_size=table_size,
+                                          max_nodes=max_nodes,
+                                          widening=widening, cache=cache)
+        self.solver_nodes = solver_nodes
 
     def new_game(self, rows, cols, num_caps=1, komi=6.5,
                  suicide_allowed=False, pass_allowed=True):
         self.num_caps = num_caps
+        self.solver = None
+        if self.solver_nodes > 0:
+            self.solver = CaptureSolver(num_caps, max_nodes=self.solver_nodes)
         super(AtariPlayer, self).new_game(rows, cols, komi, suicide_allowed, pass_allowed)
 
     def init_mcts(self, color):
-        self.mcts = AtariMCTS(self.playouts, lambda x: int(x>0), 1.0, self.num_caps)
+        self.mcts = self.make_mcts(AtariMCTS, win_score, 1.0, self.num_caps)
 
-    def gen_move(self, color):
-        oppcolor = opponent(color)
-        if self.board.captures[oppcolor] >= self.num_caps:
+    def choose_move(self, color, deadline):
+        '''Play a win proven by the solver, if any, else search.
+
+        The solver gets SOLVER_SHARE of the time to the deadline and the
+        search whatever is left.
+        '''
+        if self.board.captures[opponent(color)] >= self.num_caps:
             return RESIGN
 
-        return super(AtariPlayer, self).gen_move(color)
+        if self.solver is not None:
+            solver_deadline = None
+            if deadline is not None:
+                now = time.monotonic()
+                solver_deadline = now + SOLVER_SHARE * max(0.0, deadline - now)
+            move = self.solver.winning_move(self.board, color,
+                                            self.states_visited,
+                                            solver_deadline)
+            if move is not None and self.make_move(color, [move]) == move:
+                return move
+
+        return super(AtariPlayer, self).choose_move(color, deadline)
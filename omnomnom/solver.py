@@ -0,0 +1,172 @@
+import time
+
+from util.const import *
+from util.board import opponent
+
+class CaptureSolver:
+    '''Depth-first search for forced wins in capture Go.
+
+    A position is won for the player to move if some move reaches num_caps
+    captures or leads to a position lost for the opponent, and lost if every
+    move leads to a position won for the opponent. Only tactical moves are
+    tried: captures, ataris and liberties of weak groups. A loss is only
+    proven when the opponent threatens to win on the next move, since the
+    only replies then are to capture or to extend the threatened groups.
+
+    Proven results are kept by position, color to move, captures and ko,
+    so deeper iterations reuse them, and positions left unproven are not
+    searched again to the same depth. The search ignores superko, except
+    that moves back into visited positions are skipped. Results depend on
+    the visited positions, so every call starts from an empty table.
+    '''
+    def __init__(self, num_caps, max_nodes=5000, max_depth=24,
+                 table_size=100000):
+        self.num_caps = num_caps
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.table_size = table_size
+        self.table = {}
+        self.nodes = 0
+        self.visited = ()
+        self.deadline = None
+        self.searched = {}
+
+    def solve(self, board, color, visited=(), deadline=None):
+        '''Try to prove the result of the position for color to move.
+
+        Returns (result, move): result is True for a proven win with move
+        the winning move, False for a proven loss and None if the node
+        budget, the depth limit or deadline (a time.monotonic() value), if
+        given, ran out first.
+        '''
+        self.nodes = 0
+        self.visited = visited
+        self.deadline = deadline
+        self.table.clear()
+        self.searched = {}
+        for depth in range(1, self.max_depth+1, 2):
+            result, move = self.search(board, color, depth)
+            if result is not None or self.exhausted():
+                return result, move
+        return None, None
+
+    def winning_move(self, board, color, visited=(), deadline=None):
+        '''Return a move proven to win for color, or None.'''
+        result, move = self.solve(board, color, visited, deadline)
+        return move if result else None
+
+    def key(self, board, color):
+        return (board.get_hash(), color, board.captures[BLACK],
+                board.captures[WHITE], board.ko_move, board.ko_color)
+
+    def search(self, board, color, depth):
+        key = self.key(board, color)
+        if key in self.table:
+            return self.table[key]
+        if self.searched.get(key, -1) >= depth:
+            return None, None
+        self.nodes += 1
+
+        move = self.immediate_win(board, color)
+        if move is not None:
+            return self.store(key, True, move)
+        if depth == 0 or self.exhausted():
+            return None, None
+
+        oppcolor = opponent(color)
+        threatened = self.immediate_win(board, oppcolor) is not None
+        if threatened:
+            moves = self.defenses(board, color)
+        else:
+            moves = self.attacks(board, color)
+
+        unknown = False
+        for move in moves:
+            if not board.is_legal(color, move[0], move[1]):
+                continue
+            mark = board.mark()
+            board.place(color, move[0], move[1])
+            if board.get_hash() in self.visited:
+                board.rewind_to(mark)
+                continue
+            if board.captures[oppcolor] >= self.num_caps:
+                result = False
+            else:
+                result, reply = self.search(board, oppcolor, depth-1)
+                if result is not None:
+                    result = not result
+            board.rewind_to(mark)
+
+            if result:
+                return self.store(key, True, move)
+            if result is None:
+                unknown = True
+                if self.exhausted():
+                    break
+
+        if threatened and not unknown:
+            return self.store(key, False, None)
+        self.searched[key] = depth
+        return None, None
+
+    def exhausted(self):
+        '''Whether the node budget or the time has run out.'''
+        return self.nodes >= self.max_nodes or (
+            self.deadline is not None and time.monotonic() >= self.deadline)
+
+    def store(self, key, result, move):
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        self.table[key] = (result, move)
+        return result, move
+
+    def immediate_win(self, board, color):
+        '''Return a capture that reaches num_caps for color, or None.'''
+        for group in list(board.groups(opponent(color), 1)):
+            move = board.group_liberties(group)[0]
+            if not board.is_legal(color, move[0], move[1]):
+                continue
+            mark = board.mark()
+            board.place(color, move[0], move[1])
+            won = board.captures[color] >= self.num_caps and \
+                  board.get_hash() not in self.visited
+            board.rewind_to(mark)
+            if won:
+                return move
+        return None
+
+    def defenses(self, board, color):
+        '''Moves that may stop the opponent from winning next move.
+
+        A threatened group can only be saved by extending from its liberty
+        or by capturing a neighboring group, so no other move needs to be
+        tried to prove a loss.
+        '''
+        moves = []
+        for group in board.groups(opponent(color), 1):
+            moves.extend(board.group_liberties(group))
+        for group in board.groups(color, 1):
+            moves.extend(board.group_liberties(group))
+        return unique(moves)
+
+    def attacks(self, board, color):
+        '''Captures, ataris and liberties of weak groups, strongest first.'''
+        oppcolor = opponent(color)
+        moves = []
+        for liberties in (1, 2):
+            for group in board.groups(oppcolor, liberties):
+                moves.extend(board.group_liberties(group))
+        for liberties in (1, 2):
+            for group in board.groups(color, liberties):
+                moves.extend(board.group_liberties(group))
+        return unique(moves)
+
+def unique(moves):
+    '''Drop repeated moves, keeping the first of each.'''
+    seen = set()
+    result = []
+    for move in moves:
+        if move not in seen:
+            seen.add(move)
+            result.append(move)
+    return result
@@ -0,0 +1,47 @@
+import unittest
+
+import test.test_board as test_board
+from util.board import Board
+from util.array_board import *
+
+E = EMPTY
+B = BLACK
+W = WHITE
+
+class TestArrayBoard(test_board.TestBoard):
+    board_class = ArrayBoard
+
+    def test_atari_block(self):
+        board = ArrayBoard(5, 5)
+        board.place(B, 2, 2)
+        board.place(W, 2, 3)
+        board.place(B, 3, 3)
+        self.assertIsNone(board.atari_block)
+        board.place(B, 1, 3)
+        self.assertEqual(board.atari_block.members, set([(2,3)]))
+        self.assertEqual(board.atari_block.free_neighbors, set([(2,4)]))
+
+    def test_merge_liberties(self):
+        board = ArrayBoard(5, 5)
+        board.place(B, 2, 1)
+        board.place(B, 2, 3)
+        board.place(B, 2, 2)
+        block = board.blocks[(2,2)]
+        self.assertEqual(block.members, set([(2,1),(2,2),(2,3)]))
+        self.assertEqual(len(block.free_neighbors), 8)
+        self.assertEqual(board.libs[board.group[board.geo.point(2,2)]], 8)
+
+    def test_hash_matches_board(self):
+        config = [ [E, E, B, W, E],
+                   [W, W, B, W, W],
+                   [B, B, B, B, B],
+                   [W, E, B, W, W],
+                   [W, W, B, W, E] ]
+        board = Board(5, 5)
+        board.set_config(config)
+        array_board = ArrayBoard(5, 5)
+        array_board.set_config(config)
+        self.assertEqual(array_board.get_hash(), board.get_hash())
+
+if __name__ == '__main__':
+    unittest.main()
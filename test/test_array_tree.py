@@ -0,0 +1,62 @@
+import unittest
+
+from util.board import *
+from uiki.array_tree import *
+
+class TestArrayMCTS(unittest.TestCase):
+    def test_search_1(self):
+            board = Board(3,3)
+            visited = set()
+            color = BLACK
+            num_sims = 10000
+            score_func = lambda x: int(x>0)
+            exp_const = 1.0
+            m = ArrayMCTS(num_sims, score_func, exp_const)
+
+            self.assertEqual(m.search(board, visited, color)[0], (1,1))
+
+    def test_move_root(self):
+            board = Board(3,3)
+            m = ArrayMCTS(500, lambda x: int(x>0), 1.0)
+            m.search(board, set(), BLACK)
+            child = m.tree.find_child(m.root, (1,1))
+            count = m.tree.count[child]
+            total = m.tree.total[child]
+
+            m.move_root(BLACK, (1,1))
+            self.assertEqual(m.root_turn, WHITE)
+            self.assertEqual(m.root_color, BLACK)
+            self.assertEqual(m.tree.count[m.root], count)
+            self.assertEqual(m.tree.total[m.root], total)
+            self.assertEqual(m.tree.count[m.tree.first[m.root]:
+                             m.tree.first[m.root]+m.tree.num_children[m.root]].sum(),
+                             count - 1)
+
+            m.move_root(BLACK, (0,0))
+            self.assertIsNone(m.tree)
+
+    def test_max_nodes(self):
+            board = Board(3,3)
+            m = ArrayMCTS(2000, lambda x: int(x>0), 1.0, max_nodes=200)
+
+            self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+            self.assertEqual(m.tree.count[m.root], 2000)
+            self.assertLess(len(m.tree), 200 + 10)
+
+            m.prune()
+            self.assertLessEqual(len(m.tree), 100)
+            self.assertEqual(m.tree.count[m.root], 2000)
+            self.assertEqual(m.tree_stats()['nodes'], len(m.tree))
+
+    def test_tree_growth(self):
+            tree = ArrayTree(3, capacity=2)
+            root = tree.add_root()
+            tree.expand(root, [(0,0),(1,2),PASS])
+            self.assertEqual(len(tree), 4)
+            self.assertGreaterEqual(len(tree.count), 4)
+            self.assertEqual(tree.decode(tree.move[tree.first[root]+1]), (1,2))
+            self.assertEqual(tree.find_child(root, PASS), 3)
+            self.assertEqual(tree.find_child(root, (2,2)), -1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,5 +15,19 @@ class TestMCTS(unittest.TestCase):
 
             self.assertEqual(m.search(board, visited, color)[0], (1,1))
 
+    def test_solved_root(self):
+            board = Board(5,5)
+            config = [[EMPTY] * 5 for i in range(5)]
+            config[0][0] = WHITE
+            config[0][1] = BLACK
+            board.set_config(config)
+            m = AtariMCTS(1000, lambda x: int(x>0), 1.0, 1)
+
+            self.assertEqual(m.search(board, set(), BLACK)[0], (1,0))
+            self.assertEqual(m.root.proven, 1)
+            self.assertEqual(m.root.children[(1,0)].proven, 1)
+            self.assertLess(m.num_playouts, 1000)
+            self.assertEqual(m.num_playouts + m.playouts_saved, 1000)
+
 if __name__ == '__main__':
     unittest.main()
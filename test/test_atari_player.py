@@ -1,3 +1,4 @@
+import time
 import unittest
 
 from omnomnom.atari_player import *
@@ -6,6 +7,11 @@ B = BLACK
 W = WHITE
 E = EMPTY
 
+def state(config):
+    board = Board(len(config), len(config[0]))
+    board.set_config(config)
+    return board.get_hash()
+
 class TestAtariPlayer(unittest.TestCase):
     def test_place_move(self):
         player = AtariPlayer()
@@ -15,19 +21,21 @@ class TestAtariPlayer(unittest.TestCase):
         self.assertTrue(result)
         self.assertEqual(player.board.config, [[E,E,E],
                                                [E,E,B]])
-        self.assertEqual(player.states_visited, set(['.....X']))
+        self.assertEqual(player.states_visited, set([state([[E,E,E],[E,E,B]])]))
 
         result = player.place_move(WHITE, 1, 2)
         self.assertFalse(result)
         self.assertEqual(player.board.config, [[E,E,E],
                                                [E,E,B]])
-        self.assertEqual(player.states_visited, set(['.....X']))
+        self.assertEqual(player.states_visited, set([state([[E,E,E],[E,E,B]])]))
 
         player.place_move(WHITE, 1, 1)
         player.place_move(WHITE, 0, 2)
         self.assertEqual(player.board.config, [[E,E,W],
                                                [E,W,E]])
-        self.assertEqual(player.states_visited, set(['.....X','....OX','..O.O.']))
+        self.assertEqual(player.states_visited, set([state([[E,E,E],[E,E,B]]),
+                                                  state([[E,E,E],[E,W,B]]),
+                                                  state([[E,E,W],[E,W,E]])]))
 
     def test_resign(self):
         player = AtariPlayer()
@@ -47,5 +55,35 @@ class TestAtariPlayer(unittest.TestCase):
         move = player.gen_move(WHITE)
         self.assertEqual(move, RESIGN)
 
+    def test_solver_move(self):
+        player = AtariPlayer(playouts=10**9)
+        player.new_game(rows=9, cols=9, num_caps=1)
+        player.place_move(WHITE, 4, 4)
+        player.place_move(BLACK, 5, 4)
+        player.place_move(BLACK, 4, 3)
+        player.place_move(BLACK, 3, 5)
+        move = player.gen_move(BLACK)
+        self.assertIn(move, [(3,4), (4,5)])
+        self.assertEqual(player.board[move], BLACK)
+        self.assertIn(player.board.get_hash(), player.states_visited)
+
+        player = AtariPlayer(playouts=10, solver_nodes=0)
+        player.new_game(rows=3, cols=3, num_caps=1)
+        self.assertIsNone(player.solver)
+
+    def test_solver_time(self):
+        player = AtariPlayer(playouts=10**9)
+        player.new_game(rows=5, cols=5, num_caps=1)
+        player.set_time_settings(5, 0, 0)
+        player.set_time_left(BLACK, 0.4, 0)
+        start = time.monotonic()
+        budget = player.clock.allot(BLACK, player.board)
+        player.gen_move(BLACK)
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertLessEqual(player.solver.deadline,
+                             start + SOLVER_SHARE * budget + 0.01)
+        self.assertGreater(player.mcts.num_playouts, 0)
+        player.close()
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import test.test_board as test_board
+from util.board import Board
+from util.bit_board import *
+
+E = EMPTY
+B = BLACK
+W = WHITE
+
+class TestBitBoard(test_board.TestBoard):
+    board_class = BitBoard
+
+    def test_atari_block(self):
+        board = BitBoard(5, 5)
+        board.place(B, 2, 2)
+        board.place(W, 2, 3)
+        board.place(B, 3, 3)
+        self.assertIsNone(board.atari_block)
+        board.place(B, 1, 3)
+        self.assertEqual(board.atari_block.members, set([(2,3)]))
+        self.assertEqual(board.atari_block.free_neighbors, set([(2,4)]))
+
+    def test_flood(self):
+        board = BitBoard(5, 5)
+        config = [ [E, E, B, W, E],
+                   [W, W, B, W, W],
+                   [B, B, B, B, B],
+                   [W, E, B, W, W],
+                   [W, W, B, W, E] ]
+        board.set_config(config)
+        geo = board.geo
+        black = board.stones[B]
+        group = board.flood(1 << geo.point(0, 2), black)
+        self.assertEqual(group, black)
+        self.assertEqual(set(geo.position[i] for i in bits(board.liberties(group))),
+                         set([(0,1),(3,1)]))
+
+        white = board.stones[W]
+        group = board.flood(1 << geo.point(1, 4), white)
+        self.assertEqual(set(geo.position[i] for i in bits(group)),
+                         set([(0,3),(1,3),(1,4)]))
+        self.assertEqual(popcount(board.liberties(group)), 1)
+
+    def test_edge_masks(self):
+        geo = bit_geometry(19, 19)
+        self.assertEqual(popcount(geo.on_board), 361)
+        self.assertEqual(popcount(geo.neighbors[geo.point(0, 0)]), 2)
+        self.assertEqual(popcount(geo.neighbors[geo.point(0, 18)]), 2)
+        self.assertEqual(popcount(geo.neighbors[geo.point(5, 18)]), 3)
+        self.assertEqual(popcount(geo.expand(1 << geo.point(5, 18))), 3)
+        self.assertEqual(geo.expand(1 << geo.point(5, 0)),
+                         geo.neighbors[geo.point(5, 0)])
+
+    def test_hash_matches_board(self):
+        config = [ [E, E, B, W, E],
+                   [W, W, B, W, W],
+                   [B, B, B, B, B],
+                   [W, E, B, W, W],
+                   [W, W, B, W, E] ]
+        board = Board(5, 5)
+        board.set_config(config)
+        bit_board = BitBoard(5, 5)
+        bit_board.set_config(config)
+        self.assertEqual(bit_board.get_hash(), board.get_hash())
+
+if __name__ == '__main__':
+    unittest.main()
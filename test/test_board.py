@@ -1,3 +1,4 @@
+import copy
 import unittest
 
 from util.board import *
@@ -7,8 +8,10 @@ B = BLACK
 W = WHITE
 
 class TestBoard(unittest.TestCase):
+    board_class = Board
+
     def test_place_1(self):
-        board = Board(5, 5)
+        board = self.board_class(5, 5)
         config = [ [E, E, B, W, E],
                    [W, W, B, W, W],
                    [B, B, B, B, B],
@@ -37,7 +40,7 @@ class TestBoard(unittest.TestCase):
         self.assertIsNone(board.ko_color)
 
     def test_place_2(self):
-        board = Board(5, 5)
+        board = self.board_class(5, 5)
         config = [ [E, E, B, W, E],
                    [W, W, B, W, W],
                    [B, B, B, B, B],
@@ -66,7 +69,7 @@ class TestBoard(unittest.TestCase):
         self.assertIsNone(board.ko_color)
 
     def test_place_3(self):
-        board = Board(3, 3)
+        board = self.board_class(3, 3)
 
         board.place(B, 2, 2)
         board.place(W, 2, 1)
@@ -95,8 +98,81 @@ class TestBoard(unittest.TestCase):
         self.assertIsNone(board.ko_move)
         self.assertIsNone(board.ko_color)
 
+    def test_undo(self):
+        board = self.board_class(3, 3)
+        board.place(B, 2, 2)
+        board.place(W, 2, 1)
+        board.place(B, 1, 1)
+        board.place(W, 1, 0)
+        mark = board.mark()
+        config = [row[:] for row in board.config]
+        state = board.get_hash()
+
+        board.place(B, 2, 0)
+        self.assertEqual(board.captures, {BLACK: 1, WHITE: 0})
+        self.assertEqual(board.ko_move, (2,1))
+        board.place(W, 0, 1)
+        board.place(B, 0, 2)
+        board.undo()
+        self.assertEqual(board[0,2], E)
+        self.assertEqual(board.captures, {BLACK: 1, WHITE: 0})
+
+        board.rewind_to(mark)
+        self.assertEqual(board.config, config)
+        self.assertEqual(board.get_hash(), state)
+        self.assertEqual(board.captures, {BLACK: 0, WHITE: 0})
+        self.assertIsNone(board.ko_move)
+        self.assertEqual(board.blocks[(2,1)].members, set([(2,1)]))
+        self.assertEqual(board.blocks[(2,1)].free_neighbors, set([(2,0)]))
+        self.assertTrue(board.blocks[(2,2)].is_in_atari())
+
+    def test_undo_suicide(self):
+        board = self.board_class(3, 3, suicide_allowed=True)
+        board.place(B, 0, 1)
+        board.place(B, 1, 0)
+        board.place(W, 0, 2)
+        board.place(W, 1, 1)
+        board.place(W, 2, 0)
+        board.place(B, 0, 0)
+        self.assertEqual(board.captures, {BLACK: 0, WHITE: 3})
+        self.assertNotIn((0,1), board.blocks)
+
+        board.undo()
+        self.assertEqual(board[0,0], E)
+        self.assertEqual(board.captures, {BLACK: 0, WHITE: 0})
+        self.assertEqual(board.blocks[(0,1)].members, set([(0,1)]))
+        self.assertEqual(board.blocks[(0,1)].free_neighbors, set([(0,0)]))
+        self.assertEqual(board.blocks[(1,0)].free_neighbors, set([(0,0)]))
+        self.assertEqual(board.blocks[(1,1)].free_neighbors,
+                         set([(1,2),(2,1)]))
+
+    def test_clone(self):
+        board = self.board_class(3, 3)
+        board.place(B, 2, 2)
+        board.place(W, 2, 1)
+        board.place(B, 1, 1)
+        board.place(W, 1, 0)
+        board.place(B, 2, 0)
+
+        other = board.clone()
+        self.assertEqual(other.config, board.config)
+        self.assertEqual(other.get_hash(), board.get_hash())
+        self.assertEqual(other.ko_move, (2,1))
+        self.assertEqual(other.captures, {BLACK: 1, WHITE: 0})
+        self.assertEqual(other.mark(), 0)
+
+        other.place(W, 0, 0)
+        other.place(B, 1, 2)
+        self.assertEqual(board[0,0], E)
+        self.assertEqual(board.captures, {BLACK: 1, WHITE: 0})
+        self.assertEqual(board.blocks[(1,1)].free_neighbors,
+                         set([(0,1),(1,2),(2,1)]))
+        self.assertEqual(other.blocks[(1,1)].free_neighbors,
+                         set([(0,1),(0,2),(2,1)]))
+        self.assertIs(type(copy.deepcopy(board)), self.board_class)
+
     def test_get_state(self):
-        board = Board(5, 5)
+        board = self.board_class(5, 5)
         config = [ [E, E, B, W, E],
                    [W, W, B, W, W],
                    [B, B, B, B, B],
@@ -106,8 +182,32 @@ class TestBoard(unittest.TestCase):
 
         self.assertEqual(board.get_state(), '..XO.OOXOOXXXXXO.XOOOOXO.')
 
+    def test_get_hash(self):
+        board = self.board_class(5, 5)
+        self.assertEqual(board.get_hash(), 0)
+
+        board.place(B, 2, 2)
+        board.place(W, 2, 3)
+        other = self.board_class(5, 5)
+        other.place(W, 2, 3)
+        other.place(B, 2, 2)
+        self.assertEqual(board.get_hash(), other.get_hash())
+
+        board.place(B, 3, 3)
+        board.place(B, 1, 3)
+        board.place(B, 2, 4)
+        config = [ [E, E, E, E, E],
+                   [E, E, E, B, E],
+                   [E, E, B, E, B],
+                   [E, E, E, B, E],
+                   [E, E, E, E, E] ]
+        other.set_config(config)
+        self.assertEqual(board.config, config)
+        self.assertEqual(board.get_hash(), other.get_hash())
+        self.assertNotEqual(board.get_hash(), 0)
+
     def test_legal_moves(self):
-        board = Board(3, 3)
+        board = self.board_class(3, 3)
 
         moves = set(board.legal_moves(B))
         self.assertEqual(moves, set([(0,0),(0,1),(0,2),
@@ -153,8 +253,28 @@ class TestBoard(unittest.TestCase):
         w_moves_suicide = set(board.legal_moves(W))
         self.assertEqual(w_moves_suicide, set([(0,1),(2,1)]))
 
+    def test_random_legal_move(self):
+        board = self.board_class(3, 3)
+        board.place(B, 2, 2)
+        board.place(W, 2, 1)
+        board.place(B, 1, 1)
+        board.place(W, 1, 0)
+        board.place(B, 2, 0)
+        board.place(W, 0, 0)
+        board.place(B, 0, 2)
+
+        moves = set(board.random_legal_move(W) for i in range(20))
+        self.assertEqual(moves, set([(2,1)]))
+        moves = set(board.random_legal_move(B) for i in range(100))
+        self.assertEqual(moves, set([(0,1),(1,2),(2,1)]))
+
+        board = self.board_class(2, 2)
+        board.place(B, 0, 1)
+        board.place(B, 1, 0)
+        self.assertEqual(board.random_legal_move(W), PASS)
+
     def test_score(self):
-        board = Board(5, 5, komi=-7.0)
+        board = self.board_class(5, 5, komi=-7.0)
         config = [ [E, E, B, W, E],
                    [W, W, B, W, W],
                    [B, B, B, B, B],
@@ -172,8 +292,111 @@ class TestBoard(unittest.TestCase):
         self.assertEqual(board.score(WHITE), 16.0)
         self.assertEqual(board.score(BLACK), -16.0)
 
+    def test_area_score(self):
+        board = self.board_class(5, 5, komi=0.5)
+        config = [ [E, B, E, W, E],
+                   [B, B, E, W, W],
+                   [E, B, E, W, E],
+                   [B, B, W, W, W],
+                   [E, B, W, E, E] ]
+        board.set_config(config)
+
+        self.assertEqual(board.area_score(BLACK), 10 - 12 - 0.5)
+        self.assertEqual(board.area_score(WHITE), 12 - 10 + 0.5)
+        self.assertEqual(self.board_class(3, 3).area_score(BLACK), 0)
+
+    def test_is_eye(self):
+        board = self.board_class(5, 5)
+        config = [ [E, B, E, W, E],
+                   [B, B, B, B, W],
+                   [E, B, E, B, E],
+                   [B, W, B, B, W],
+                   [E, E, W, W, E] ]
+        board.set_config(config)
+
+        self.assertTrue(board.is_eye(B, 0, 0))
+        self.assertFalse(board.is_eye(W, 0, 0))
+        self.assertTrue(board.is_eye(B, 2, 2))
+        self.assertFalse(board.is_eye(B, 2, 0))
+        self.assertFalse(board.is_eye(W, 0, 4))
+        self.assertFalse(board.is_eye(B, 0, 2))
+        self.assertFalse(board.is_eye(B, 1, 1))
+
+    def test_random_legal_move_eyes(self):
+        board = self.board_class(3, 3)
+        board.place(B, 0, 1)
+        board.place(B, 1, 0)
+        board.place(B, 1, 1)
+        board.place(B, 1, 2)
+        board.place(B, 2, 1)
+
+        self.assertEqual(board.random_legal_move(B, fill_eyes=False), PASS)
+        self.assertIn(board.random_legal_move(B), set([(0,0),(0,2),(2,0),(2,2)]))
+        self.assertEqual(board.random_legal_move(W, fill_eyes=False), PASS)
+
+    def test_groups(self):
+        def liberties(board, color, n):
+            return sorted(sorted(board.group_liberties(g))
+                          for g in board.groups(color, n))
+
+        board = self.board_class(5, 5)
+        board.place(B, 2, 2)
+        self.assertEqual(liberties(board, B, 3),
+                         [[(1,2), (2,1), (2,3), (3,2)]])
+        board.place(W, 1, 2)
+        board.place(W, 2, 1)
+        self.assertEqual(liberties(board, B, 2), [[(2,3), (3,2)]])
+        board.place(W, 3, 2)
+        self.assertEqual(liberties(board, B, 1), [[(2,3)]])
+        self.assertEqual(liberties(board, B, 3), [])
+        self.assertEqual(len(board.groups(W, 3)), 3)
+
+        mark = board.mark()
+        board.place(B, 2, 3)
+        self.assertEqual(liberties(board, B, 3), [[(1,3), (2,4), (3,3)]])
+        self.assertEqual(liberties(board, B, 1), [])
+        board.place(W, 1, 3)
+        board.place(W, 3, 3)
+        board.place(W, 2, 4)
+        self.assertEqual(board.captures[W], 2)
+        self.assertEqual([len(board.groups(B, n)) for n in (1, 2, 3)],
+                         [0, 0, 0])
+        self.assertEqual(liberties(board, W, 1), [])
+
+        board.rewind_to(mark)
+        self.assertEqual(liberties(board, B, 1), [[(2,3)]])
+        self.assertEqual(len(board.groups(W, 3)), 3)
+        self.assertEqual(liberties(board.clone(), B, 1), [[(2,3)]])
+
+    def test_symmetry(self):
+        board = self.board_class(5, 5)
+        self.assertEqual(len(board.fixing_symmetries()), 7)
+        board.place(B, 0, 2)
+        board.place(W, 2, 2)
+        self.assertEqual(len(board.fixing_symmetries()), 1)
+
+        other = self.board_class(5, 5)
+        other.place(B, 2, 4)
+        other.place(W, 2, 2)
+        self.assertEqual(other.canonical_hash()[0], board.canonical_hash()[0])
+        self.assertNotEqual(other.get_hash(), board.get_hash())
+
+        symmetry = board.symmetry
+        for t in range(symmetry.count):
+            self.assertEqual(symmetry.untransform(
+                symmetry.transform((0,3), t), t), (0,3))
+            self.assertEqual(symmetry.transform(PASS, t), PASS)
+
+        canonical = board.canonical_hash()
+        board.place(B, 4, 4)
+        self.assertEqual(board.fixing_symmetries(), [])
+        self.assertEqual(board.clone().canonical_hash(),
+                         board.canonical_hash())
+        board.undo()
+        self.assertEqual(board.canonical_hash(), canonical)
+
     def test_blocks_1(self):
-        board = Board(5, 5)
+        board = self.board_class(5, 5)
         board.place(B, 2, 2)
         self.assertEqual(set(board.blocks.keys()), set([(2,2)]))
         self.assertEqual(board.blocks[(2,2)].members, set([(2,2)]))
@@ -183,7 +406,7 @@ class TestBoard(unittest.TestCase):
         self.assertFalse(board.blocks[(2,2)].is_captured())
 
     def test_blocks_2(self):
-        board = Board(5, 5)
+        board = self.board_class(5, 5)
         board.place(B, 2, 2)
         board.place(W, 2, 3)
         self.assertEqual(set(board.blocks.keys()), set([(2,2),(2,3)]))
@@ -199,7 +422,7 @@ class TestBoard(unittest.TestCase):
         self.assertFalse(board.blocks[(2,3)].is_captured())
 
     def test_blocks_3(self):
-        board = Board(5, 5)
+        board = self.board_class(5, 5)
         board.place(B, 2, 2)
         board.place(W, 2, 3)
         board.place(B, 1, 2)
@@ -217,7 +440,7 @@ class TestBoard(unittest.TestCase):
         self.assertFalse(board.blocks[(2,3)].is_captured())
 
     def test_blocks_4(self):
-        board = Board(5, 5)
+        board = self.board_class(5, 5)
         board.place(B, 2, 2)
         board.place(W, 2, 3)
         board.place(B, 3, 3)
@@ -226,7 +449,7 @@ class TestBoard(unittest.TestCase):
         self.assertFalse(board.blocks[(2,3)].is_captured())
 
     def test_blocks_5(self):
-        board = Board(5, 5)
+        board = self.board_class(5, 5)
         board.place(B, 2, 2)
         board.place(W, 2, 3)
         board.place(B, 3, 3)
@@ -0,0 +1,56 @@
+import unittest
+
+from util.board import *
+from uiki.clock import *
+
+class TestClock(unittest.TestCase):
+    def test_unlimited(self):
+        clock = Clock()
+        self.assertIsNone(clock.allot(BLACK, Board(9,9)))
+
+    def test_main_time(self):
+        clock = Clock(margin=0.5, min_moves=10)
+        clock.set_time_settings(100, 0, 0)
+        board = Board(9,9)
+
+        self.assertAlmostEqual(clock.allot(BLACK, board), 100/40 - 0.5)
+        clock.spend(BLACK, 10)
+        self.assertEqual(clock.time_left[BLACK], 90)
+        self.assertEqual(clock.time_left[WHITE], 100)
+
+    def test_margin(self):
+        clock = Clock(margin=0.5)
+        clock.set_time_settings(1, 0, 0)
+        clock.set_time_left(BLACK, 0.2, 0)
+
+        self.assertAlmostEqual(clock.allot(BLACK, Board(9,9)), 0.1)
+        clock.set_time_left(BLACK, 0.1, 0)
+        self.assertAlmostEqual(clock.allot(BLACK, Board(9,9)), 0.05)
+        clock.set_time_left(BLACK, -1.0, 0)
+        self.assertEqual(clock.allot(BLACK, Board(9,9)), 0)
+
+    def test_byo_yomi(self):
+        clock = Clock(margin=0.5)
+        clock.set_time_settings(0, 30, 5)
+        board = Board(9,9)
+
+        self.assertAlmostEqual(clock.allot(BLACK, board), 30/5 - 0.5)
+        for k in range(5):
+            clock.spend(BLACK, 1)
+        self.assertEqual(clock.time_left[BLACK], 30)
+        self.assertEqual(clock.stones_left[BLACK], 5)
+
+    def test_enter_byo_yomi(self):
+        clock = Clock(margin=0.5)
+        clock.set_time_settings(10, 30, 5)
+        clock.spend(BLACK, 11)
+
+        self.assertEqual(clock.time_left[BLACK], 29)
+        self.assertEqual(clock.stones_left[BLACK], 5)
+
+    def test_time_left(self):
+        clock = Clock(margin=0.5)
+        clock.set_time_settings(600, 30, 5)
+        clock.set_time_left(WHITE, 20, 4)
+
+        self.assertAlmostEqual(clock.allot(WHITE, Board(9,9)), 20/4 - 0.5)
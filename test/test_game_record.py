@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from util.game_record import *
+
+class TestGameRecord(unittest.TestCase):
+    def make_record(self):
+        record = GameRecord(9, 9, komi=7.5, num_caps=0)
+        record.add_move(BLACK, (2,2))
+        record.add_move(WHITE, (6,6))
+        record.add_move(BLACK, PASS)
+        record.add_move(WHITE, (0,8))
+        record.set_result(WHITE, 'score', -3.5)
+        return record
+
+    def test_bytes(self):
+        record = self.make_record()
+        data = record.to_bytes()
+        self.assertEqual(len(data), HEADER.size + 2*4)
+
+        copy, offset = GameRecord.from_bytes(data)
+        self.assertEqual(offset, len(data))
+        self.assertEqual(copy.moves, record.moves)
+        self.assertEqual((copy.rows, copy.cols, copy.komi, copy.num_caps),
+                         (9, 9, 7.5, 0))
+        self.assertEqual((copy.winner, copy.reason, copy.score),
+                         (WHITE, 'score', -3.5))
+        self.assertRaises(ValueError, GameRecord.from_bytes, data, 2)
+
+    def test_sgf(self):
+        record = self.make_record()
+        self.assertEqual(record.to_sgf(),
+                         '(;GM[1]FF[4]SZ[9]KM[7.5]RU[Chinese]RE[W+3.5]'
+                         ';B[cg];W[gc];B[];W[ii])\n')
+
+        record = GameRecord(5, 7, komi=0.5, num_caps=2)
+        record.add_move(BLACK, (4,6))
+        record.set_result(BLACK, 'resign')
+        self.assertEqual(record.to_sgf(),
+                         '(;GM[1]FF[4]SZ[7:5]KM[0.5]RU[Capture 2]RE[B+R]'
+                         ';B[ga])\n')
+        record.set_result(None, 'limit')
+        self.assertEqual(record.result(), '0')
+
+    def test_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'games')
+            append_records(path, [self.make_record()])
+            other = GameRecord(5, 5, komi=0.5, num_caps=1)
+            other.set_result(BLACK, 'captures', 0.5)
+            append_records(path, [other])
+
+            records = read_records(path)
+            self.assertEqual(len(records), 2)
+            self.assertEqual(records[0].moves, self.make_record().moves)
+            self.assertEqual(records[1].moves, [])
+            self.assertEqual(records[1].result(), 'B+1')
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
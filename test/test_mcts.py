@@ -1,3 +1,4 @@
+import time
 import unittest
 
 from util.board import *
@@ -15,5 +16,302 @@ class TestMCTS(unittest.TestCase):
 
             self.assertEqual(m.search(board, visited, color)[0], (1,1))
 
+    def test_search_deadline(self):
+            board = Board(3,3)
+            m = MCTS(10**9, lambda x: int(x>0), 1.0)
+            start = time.monotonic()
+
+            m.search(board, set(), BLACK, start + 0.2)
+            self.assertLess(time.monotonic() - start, 1.0)
+            self.assertEqual(m.root.count, m.num_playouts)
+            self.assertGreater(m.num_playouts, 0)
+
+            m = MCTS(10**9, lambda x: int(x>0), 1.0)
+            m.search(board, set(), BLACK, time.monotonic() - 1.0)
+            self.assertEqual(m.num_playouts, 0)
+
+    def test_early_stop(self):
+            board = Board(3,3)
+            m = MCTS(10000, lambda x: int(x>0), 1.0, early_stop=True)
+
+            self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+            self.assertGreater(m.playouts_saved, 0)
+            self.assertEqual(m.num_playouts + m.playouts_saved, 10000)
+            counts = sorted(c.count for c in m.root.children.values())
+            self.assertGreater(counts[-1] - counts[-2], m.playouts_saved)
+
+    def test_stop_bound(self):
+            board = Board(3,3)
+            m = MCTS(10000, lambda x: int(x>0), 1.0, stop_bound=3.0)
+
+            self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+            self.assertEqual(m.num_playouts + m.playouts_saved, 10000)
+            self.assertLess(m.num_playouts, 10000)
+
+    def test_rave(self):
+            board = Board(3,3)
+            m = MCTS(2000, lambda x: int(x>0), 1.0, rave=100)
+
+            self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+            self.assertEqual(set(m.root.amaf),
+                             set((i, j) for i in range(3) for j in range(3)))
+            for move, (total, count) in m.root.amaf.items():
+                self.assertNotEqual(move, PASS)
+                self.assertGreaterEqual(count, m.root.children[move].count
+                                        if move in m.root.children else 0)
+
+    def test_rave_early_stop(self):
+            board = Board(3,3)
+            m = MCTS(100, lambda x: int(x>0), 1.0, early_stop=True, rave=100)
+            m.set_root(BLACK)
+            m.root.expand(board)
+            m.seed_root(board, {(0,0): (12.0, 20), (1,1): (2.0, 5)})
+            m.root.amaf[(0,0)] = [0.0, 100]
+            m.root.amaf[(1,1)] = [100.0, 100]
+
+            self.assertEqual(m.ranked_moves(board)[0], (1,1))
+            self.assertFalse(m.can_stop(10, board))
+            m.rave = 0
+            self.assertTrue(m.can_stop(10, board))
+
+            m.rave = 100
+            m.root.amaf[(0,1)] = [100.0, 100]
+            self.assertEqual(m.ranked_moves(board)[:2], [(1,1), (0,0)])
+            self.assertIn((0,1), m.ranked_moves(board))
+
+    def test_update_amaf(self):
+            m = MCTS(1, lambda x: x, 1.0, rave=100)
+            m.set_root(BLACK)
+            m.root.add_child((0,0)).add_child((1,1))
+            played = [(BLACK, (0,1)), (WHITE, (0,0)), (BLACK, PASS)]
+            m.update_tree([(0,0), (1,1)], 1, played)
+
+            root = m.root
+            child = root.children[(0,0)]
+            grandchild = child.children[(1,1)]
+            self.assertEqual(root.amaf, {(0,0): [1,1], (0,1): [1,1]})
+            self.assertEqual(child.amaf, {(1,1): [1,1], (0,0): [1,1]})
+            self.assertEqual(grandchild.amaf, {(0,1): [1,1]})
+
+            m.set_root(WHITE, BLACK)
+            m.root.add_child((0,0)).add_child((1,1))
+            played = [(WHITE, (0,1)), (BLACK, (0,0)), (WHITE, PASS)]
+            m.update_tree([(0,0), (1,1)], 1, played)
+            self.assertEqual(m.root.amaf, {(0,0): [1,1], (0,1): [1,1]})
+            self.assertEqual(m.root.children[(0,0)].amaf,
+                             {(1,1): [1,1], (0,0): [1,1]})
+
+    def test_max_nodes(self):
+            board = Board(3,3)
+            m = MCTS(2000, lambda x: int(x>0), 1.0, max_nodes=100)
+
+            self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+            self.assertEqual(m.root.count, 2000)
+            self.assertEqual(m.num_nodes, 100)
+            self.assertEqual(m.tree_stats()['nodes'], 100)
+
+            m.prune()
+            self.assertLessEqual(m.num_nodes, 50)
+            self.assertEqual(m.tree_stats()['nodes'], m.num_nodes)
+            self.assertEqual(m.root.count, 2000)
+
+    def test_prune_shared(self):
+            m = MCTS(1, lambda x: int(x>0), 1.0, max_nodes=4)
+            m.set_root(BLACK)
+            a = m.root.add_child((0,0))
+            b = a.add_child((0,1))
+            b.add_child((0,2), a)
+            m.root.add_child((1,1), b)
+            leaf = b.add_child((1,0))
+            for node in (m.root, a, b, leaf):
+                for i in range(100):
+                    node.update(1)
+            leaf.add_child((2,2))
+            m.num_nodes = 5
+
+            m.prune()
+            self.assertEqual(m.num_nodes, 3)
+            self.assertEqual(len(m.tree_nodes()), 3)
+            self.assertEqual(a.children, {})
+
+    def test_simulate_default_eyes(self):
+            board = Board(3,3, komi=0.5)
+            board.set_config([[EMPTY, BLACK, EMPTY],
+                              [BLACK, BLACK, BLACK],
+                              [EMPTY, BLACK, EMPTY]])
+            m = MCTS(1, lambda x: int(x>0), 1.0)
+            m.set_root(WHITE)
+            mark = board.mark()
+
+            outcome = m.simulate_default(board, WHITE, VisitedStates(set()), 100)
+            self.assertEqual(outcome, -8.5)
+            self.assertEqual(board.mark(), mark + 2)
+            self.assertEqual(board[0,0], EMPTY)
+
+    def test_default_move(self):
+            board = Board(5,5)
+            board.set_config([[WHITE, BLACK, EMPTY, EMPTY, EMPTY],
+                              [EMPTY, EMPTY, EMPTY, EMPTY, EMPTY],
+                              [EMPTY, EMPTY, EMPTY, EMPTY, EMPTY],
+                              [EMPTY, EMPTY, EMPTY, EMPTY, WHITE],
+                              [EMPTY, EMPTY, EMPTY, EMPTY, BLACK]])
+            m = MCTS(1, lambda x: int(x>0), 1.0)
+
+            self.assertEqual(m.default_move(board, BLACK), (1,0))
+            self.assertEqual(m.default_move(board, WHITE), (4,3))
+            board.place(BLACK, 1, 0)
+            self.assertEqual(board[0,0], EMPTY)
+            self.assertEqual(m.default_move(board, WHITE), (4,3))
+            board.place(WHITE, 2, 4)
+            board.place(WHITE, 3, 3)
+            self.assertEqual(m.default_move(board, BLACK), (4,3))
+
+    def test_move_priors(self):
+            board = Board(5,5)
+            board.set_config([[WHITE, BLACK, EMPTY, EMPTY, EMPTY],
+                              [EMPTY, EMPTY, EMPTY, EMPTY, EMPTY],
+                              [EMPTY, EMPTY, EMPTY, EMPTY, EMPTY],
+                              [EMPTY, EMPTY, EMPTY, EMPTY, EMPTY],
+                              [EMPTY, EMPTY, EMPTY, EMPTY, EMPTY]])
+            moves = list(board.legal_moves(BLACK)) + [PASS]
+            priors = move_priors(board, BLACK, moves, (3,3))
+
+            self.assertEqual(max(moves, key=priors.get), (1,0))
+            self.assertEqual(min(moves, key=priors.get), PASS)
+            self.assertEqual(priors[(3,3)], 3)
+            self.assertEqual(priors[(2,2)], 2)
+            self.assertEqual(priors[(4,4)], 2 - 4)
+            self.assertEqual(move_priors(board, WHITE, moves)[(1,0)], 4)
+
+    def test_widening(self):
+            board = Board(5,5)
+            node = Node(BLACK)
+            node.expand(board, (2,2), prior=True)
+            self.assertEqual(node.moves[0], (2,2))
+            self.assertEqual(node.moves[-1], PASS)
+            self.assertEqual(node.untried[-1], (2,2))
+            self.assertIsNone(node.width(0))
+
+            for i in range(9):
+                node.update(0)
+            self.assertEqual(node.width(1.0), 4)
+            self.assertEqual(len(node.move_values(board, BLACK, 1.0, rave=1,
+                                                  widening=1.0)), 4)
+            for move in node.moves[:4]:
+                node.add_child(move).update(1)
+            self.assertIn(node.select_move(board, BLACK, 1.0, widening=1.0),
+                          node.moves[:4])
+
+            m = MCTS(500, lambda x: int(x>0), 1.0, widening=1.0)
+            m.search(Board(3,3), set(), BLACK)
+            self.assertLessEqual(len(m.root.children), m.root.width(1.0))
+            self.assertEqual(m.root.count, 500)
+
+    def test_prove(self):
+            board = Board(2,3)
+            board.place(WHITE, 0, 0)
+            m = MCTS(1, lambda x: int(x>0), 1.0)
+            m.set_root(BLACK)
+            root = m.root
+            root.expand(board)
+            child = root.add_child((0,1))
+            child.expand(board)
+            for move in child.moves:
+                child.add_child(move)
+                m.update_tree([(0,1), move], 0)
+
+            m.update_tree([(0,1), (1,0)], 1, proven=True)
+            self.assertEqual(child.children[(1,0)].proven, 1)
+            self.assertIsNone(child.proven)
+            self.assertNotEqual(child.select_move(board, BLACK, 1.0), (1,0))
+
+            m.update_tree([(0,1), (1,1)], -1, proven=True)
+            self.assertEqual(child.proven, -1)
+            self.assertIsNone(root.proven)
+            root.add_child((1,1))
+            m.update_tree([(1,1)], 0)
+            self.assertEqual(root.select_move(board, BLACK, 1.0), (0,2))
+            self.assertEqual(root.select_moves(board, BLACK, 0)[-1], (0,1))
+
+            root.add_child((1,2))
+            m.update_tree([(1,2)], 1, proven=True)
+            self.assertEqual(root.proven, 1)
+            self.assertTrue(m.root_solved())
+            self.assertEqual(root.select_moves(board, BLACK, 0)[0], (1,2))
+            m.search(board, set(), BLACK)
+            self.assertEqual(m.num_playouts, 0)
+
+    def test_prove_loss(self):
+            board = Board(2,2)
+            board.place(WHITE, 0, 0)
+            m = MCTS(1, lambda x: int(x>0), 1.0)
+            m.set_root(BLACK)
+            m.root.expand(board)
+            for move in list(m.root.untried):
+                m.root.add_child(move)
+                m.update_tree([move], -1, proven=move != PASS)
+            self.assertIsNone(m.root.proven)
+            self.assertEqual(m.root.select_move(board, BLACK, 1.0), PASS)
+
+            m.update_tree([PASS], -1, proven=True)
+            self.assertEqual(m.root.proven, -1)
+            self.assertEqual(m.root.select_moves(board, BLACK, 0)[-1], PASS)
+
+    def test_search_threads(self):
+            board = Board(3,3)
+            m = MCTS(4000, lambda x: int(x>0), 1.0, threads=4)
+
+            self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+            self.assertEqual(m.root.count, 4000)
+            nodes = [m.root]
+            while nodes:
+                node = nodes.pop()
+                children = list(node.children.values())
+                if children:
+                    self.assertEqual(sum(c.count for c in children),
+                                     node.count - 1)
+                self.assertTrue(0 <= node.total <= node.count)
+                nodes.extend(children)
+
+    def test_visited_states(self):
+            history = set([1, 2])
+            visited = VisitedStates(history)
+            visited.add(3)
+            self.assertIn(1, visited)
+            self.assertIn(3, visited)
+            self.assertEqual(len(visited), 3)
+
+            visited.clear()
+            self.assertNotIn(3, visited)
+            self.assertEqual(len(visited), 2)
+            self.assertEqual(history, set([1, 2]))
+
+    def test_node_moves_cached(self):
+            board = Board(2,3)
+            board.place(WHITE, 0, 0)
+            node = Node(BLACK)
+            node.update(1)
+            self.assertEqual(node.select_move(board, BLACK, 1.0), (0,1))
+            self.assertEqual(node.moves, [(0,1),(0,2),(1,0),(1,1),(1,2),PASS])
+
+            node.add_child((0,1)).update(0)
+            node.update(0)
+            board.place(WHITE, 0, 2)
+            self.assertEqual(node.select_move(board, BLACK, 1.0), (0,2))
+            self.assertEqual(node.untried, [PASS,(1,2),(1,1),(1,0),(0,2)])
+
+            node.add_child((1,0)).update(1)
+            self.assertEqual(node.untried, [PASS,(1,2),(1,1),(0,2)])
+
+    def test_node_moves_symmetry(self):
+            board = Board(3,3)
+            self.assertEqual(list(Node(BLACK).possible_moves(board)),
+                             [(0,0),(0,1),(1,1),PASS])
+            board.place(BLACK, 0, 1)
+            self.assertEqual(list(Node(WHITE).possible_moves(board)),
+                             [(0,0),(1,0),(1,1),(2,0),(2,1),PASS])
+            board.place(WHITE, 0, 0)
+            self.assertEqual(len(list(Node(BLACK).possible_moves(board))), 8)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from util.board import *
+from uiki.mcts import *
+from uiki.opening_cache import *
+
+class TestOpeningCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_add_lookup(self):
+        cache = OpeningCache(self.path, writable=True, slots=64)
+        board = Board(5, 5, komi=6.5)
+        board.place(BLACK, 0, 1)
+        stats = {(3,4): (1.5, 2), PASS: (0.0, 1)}
+        cache.add(board, WHITE, stats)
+        cache.add(board, WHITE, {(3,4): (0.5, 1)})
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.lookup(board, WHITE),
+                         {(3,4): (2.0, 3), PASS: (0.0, 1)})
+        self.assertEqual(cache.lookup(board, BLACK), {})
+        self.assertEqual(cache.lookup(board, WHITE, num_caps=1), {})
+
+        other = Board(5, 5, komi=6.5)
+        other.place(BLACK, 1, 0)
+        self.assertEqual(cache.lookup(other, WHITE),
+                         {(4,3): (2.0, 3), PASS: (0.0, 1)})
+        other.set_komi(7.5)
+        self.assertEqual(cache.lookup(other, WHITE), {})
+        cache.close()
+
+        cache = OpeningCache(self.path)
+        self.assertEqual(cache.lookup(board, WHITE)[(3,4)], (2.0, 3))
+        self.assertRaises(ValueError, cache.add, board, WHITE, stats)
+        cache.close()
+
+    def test_max_visits(self):
+        cache = OpeningCache(self.path, writable=True, slots=64,
+                             max_visits=10, depth=1)
+        board = Board(5, 5)
+        cache.add(board, BLACK, {(2,2): (30.0, 40), (1,2): (2.0, 8),
+                                 (0,0): (0.0, 1)})
+        self.assertEqual(cache.lookup(board, BLACK),
+                         {(2,2): (6.0, 8), (1,2): (0.25, 1)})
+
+        board.place(BLACK, 2, 2)
+        cache.add(board, WHITE, {(1,1): (1.0, 1)})
+        self.assertEqual(cache.lookup(board, WHITE), {})
+        self.assertEqual(len(cache), 1)
+        cache.close()
+
+    def test_full(self):
+        cache = OpeningCache(self.path, writable=True, slots=4)
+        boards = []
+        for k, (row, col) in enumerate([(0,0), (0,1), (0,2), (0,3), (1,1)]):
+            board = Board(7, 7)
+            board.place(BLACK, row, col)
+            boards.append(board)
+            cache.add(board, WHITE, {(3,3): (1.0, k+1)})
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(cache.lookup(boards[4], WHITE), {(3,3): (1.0, 5)})
+        self.assertEqual(cache.lookup(boards[0], WHITE), {})
+        self.assertEqual(cache.lookup(boards[1], WHITE), {(3,3): (1.0, 2)})
+        cache.close()
+
+    def test_not_a_cache(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 100)
+        self.assertRaises(ValueError, OpeningCache, self.path)
+
+    def test_mcts(self):
+        cache = OpeningCache(self.path, writable=True, slots=64)
+        board = Board(3, 3)
+        m = MCTS(200, lambda x: int(x>0), 1.0, cache=cache)
+        m.search(board, set(), BLACK)
+        m.update_cache(board)
+        stats = cache.lookup(board, BLACK)
+        self.assertEqual(sum(count for total, count in stats.values()), 199)
+        m.update_cache(board)
+        self.assertEqual(cache.lookup(board, BLACK), stats)
+
+        m = MCTS(100, lambda x: int(x>0), 1.0, cache=cache)
+        m.search(board, set(), BLACK)
+        self.assertEqual(m.root.count, 100 + 199)
+        self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+        m.update_cache(board)
+        stats = cache.lookup(board, BLACK)
+        self.assertEqual(sum(count for total, count in stats.values()), 399)
+
+    def test_symmetric_root(self):
+        cache = OpeningCache(self.path, writable=True, slots=64)
+        board = Board(5, 5)
+        cache.add(board, BLACK, {(4,4): (3.0, 4), (0,4): (1.0, 2)})
+        m = MCTS(1, lambda x: int(x>0), 1.0, cache=cache)
+        m.search(board, set(), BLACK)
+
+        corner = [move for move in m.root.moves
+                  if move in ((0,0), (0,4), (4,0), (4,4))]
+        self.assertEqual(len(corner), 1)
+        self.assertEqual(m.root.count, 6 + 1)
+        self.assertEqual(m.seeded, {corner[0]: (4.0, 6)})
+
+if __name__ == '__main__':
+    unittest.main()
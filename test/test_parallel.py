@@ -0,0 +1,50 @@
+import unittest
+import multiprocessing
+
+from util.board import *
+from uiki.player import *
+from omnomnom.atari_mcts import *
+
+class TestRootParallelMCTS(unittest.TestCase):
+    def setUp(self):
+            self.pool = multiprocessing.Pool(2)
+
+    def tearDown(self):
+            self.pool.terminate()
+
+    def test_search_1(self):
+            board = Board(3,3)
+            m = RootParallelMCTS(self.pool, 2, MCTS, 10000, win_score, 1.0)
+
+            self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+            self.assertEqual(m.root.count, sum(child.count for child in
+                                               m.root.children.values()))
+            self.assertGreater(m.root.count, 9000)
+            self.assertEqual(m.num_playouts, 10000)
+            self.assertEqual(m.playouts_saved, 0)
+            self.assertEqual(m.root_color, BLACK)
+
+            m = RootParallelMCTS(self.pool, 2, MCTS, 10000, win_score, 1.0,
+                                 early_stop=True)
+            m.search(board, set(), BLACK)
+            self.assertEqual(m.num_playouts + m.playouts_saved, 10000)
+
+    def test_search_atari(self):
+            board = Board(3,3)
+            m = RootParallelMCTS(self.pool, 2, AtariMCTS, 10000, win_score, 1.0, 1)
+
+            self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+
+    def test_player(self):
+            player = Player(playouts=200, workers=2)
+            player.new_game(rows=3, cols=3)
+            pool = player.pool
+            player.gen_move(BLACK)
+            player.reset_game()
+            self.assertIs(player.pool, pool)
+            self.assertIsInstance(player.mcts, RootParallelMCTS)
+            player.close()
+            self.assertIsNone(player.pool)
+
+if __name__ == '__main__':
+    unittest.main()
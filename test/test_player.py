@@ -1,3 +1,4 @@
+import time
 import unittest
 
 from uiki.player import *
@@ -6,6 +7,11 @@ B = BLACK
 W = WHITE
 E = EMPTY
 
+def state(config):
+    board = Board(len(config), len(config[0]))
+    board.set_config(config)
+    return board.get_hash()
+
 class TestPlayer(unittest.TestCase):
     def test_place_move(self):
         player = Player()
@@ -15,19 +21,86 @@ class TestPlayer(unittest.TestCase):
         self.assertTrue(result)
         self.assertEqual(player.board.config, [[E,E,E],
                                                [E,E,B]])
-        self.assertEqual(player.states_visited, set(['.....X']))
+        self.assertEqual(player.states_visited, set([state([[E,E,E],[E,E,B]])]))
 
         result = player.place_move(WHITE, 1, 2)
         self.assertFalse(result)
         self.assertEqual(player.board.config, [[E,E,E],
                                                [E,E,B]])
-        self.assertEqual(player.states_visited, set(['.....X']))
+        self.assertEqual(player.states_visited, set([state([[E,E,E],[E,E,B]])]))
 
         player.place_move(WHITE, 1, 1)
         player.place_move(WHITE, 0, 2)
         self.assertEqual(player.board.config, [[E,E,W],
                                                [E,W,E]])
-        self.assertEqual(player.states_visited, set(['.....X','....OX','..O.O.']))
+        self.assertEqual(player.states_visited, set([state([[E,E,E],[E,E,B]]),
+                                                  state([[E,E,E],[E,W,B]]),
+                                                  state([[E,E,W],[E,W,E]])]))
+
+    def test_ponder(self):
+        player = Player(playouts=200, ponder=True)
+        player.new_game(rows=3, cols=3)
+        move = player.gen_move(BLACK)
+        self.assertIsNotNone(player.ponder_thread)
+
+        time.sleep(0.3)
+        player.stop_pondering()
+        self.assertIsNone(player.ponder_thread)
+        root = player.mcts.root
+        self.assertEqual(root.color, WHITE)
+        self.assertGreater(root.count, 200)
+
+        reply = max((m for m in root.children if m != PASS),
+                    key=lambda m: root.children[m].count)
+        count = root.children[reply].count
+        player.place_move(WHITE, reply[0], reply[1])
+        self.assertEqual(player.mcts.root.count, count)
+        player.close()
+
+    def test_ponder_values(self):
+        player = Player(playouts=300, ponder=True)
+        player.new_game(rows=3, cols=3)
+        self.assertEqual(player.gen_move(BLACK), (1,1))
+        root = player.mcts.root
+        total, count = root.total, root.count
+        self.assertGreater(total / count, 0.6)
+
+        time.sleep(0.3)
+        player.stop_pondering()
+        self.assertIs(player.mcts.root, root)
+        self.assertEqual(player.mcts.root_color, BLACK)
+        self.assertGreater(root.count, count)
+        self.assertGreater((root.total - total) / (root.count - count), 0.6)
+        player.close()
+
+    def test_ponder_amaf(self):
+        player = Player(playouts=300, ponder=True, rave=100)
+        player.new_game(rows=3, cols=3)
+        player.gen_move(BLACK)
+        root = player.mcts.root
+        before = dict((move, (child.count, root.amaf.get(move, [0, 0])[1]))
+                      for move, child in root.children.items())
+
+        time.sleep(0.3)
+        player.stop_pondering()
+        self.assertIs(player.mcts.root, root)
+        for move, child in root.children.items():
+            if move != PASS:
+                count, amaf_count = before.get(move, (0, 0))
+                self.assertGreaterEqual(root.amaf[move][1] - amaf_count,
+                                        child.count - count)
+        player.close()
+
+    def test_no_time_left(self):
+        player = Player(playouts=1000)
+        player.new_game(rows=3, cols=3)
+        player.set_time_settings(5, 0, 0)
+        player.set_time_left(BLACK, 0.4, 0)
+        start = time.monotonic()
+        player.gen_move(BLACK)
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertGreater(player.mcts.num_playouts, 0)
+        player.close()
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from util.board import *
+from util.game_record import *
+from uiki.player import Player
+from uiki.selfplay import *
+from omnomnom.atari_player import AtariPlayer
+
+class TestSelfPlay(unittest.TestCase):
+    def test_play_game(self):
+        rules = GameRecord(3, 3, komi=0.5)
+        record = play_game(Player(playouts=100), Player(playouts=100), rules)
+
+        self.assertEqual(rules.moves, [])
+        self.assertIn(record.reason, ('score', 'resign'))
+        self.assertEqual(record.moves[0][0], BLACK)
+        board = Board(3, 3, komi=0.5)
+        for color, move in record.moves:
+            if move != PASS:
+                self.assertTrue(board.is_legal(color, move[0], move[1]))
+                board.place(color, move[0], move[1])
+        if record.reason == 'score':
+            self.assertEqual([move for color, move in record.moves[-2:]],
+                             [PASS, PASS])
+            self.assertEqual(record.score, board.area_score(BLACK))
+
+    def test_capture_game(self):
+        rules = GameRecord(5, 5, komi=0.5, num_caps=1)
+        record = play_game(AtariPlayer(playouts=50), AtariPlayer(playouts=50),
+                           rules, max_moves=4)
+        self.assertLessEqual(len(record.moves), 4)
+        self.assertIn(record.reason, ('captures', 'limit'))
+
+    def test_run_games(self):
+        rules = GameRecord(3, 3, komi=0.5)
+        first = (Player, {'playouts': 20})
+        second = (Player, {'playouts': 40})
+        results = list(run_games(first, second, rules, 3, max_moves=6))
+        self.assertEqual([(k, first_black) for k, first_black, record
+                          in results], [(0, True), (1, False), (2, True)])
+        for k, first_black, record in results:
+            self.assertLessEqual(len(record.moves), 6)
+
+    def test_run_games_workers(self):
+        rules = GameRecord(3, 3, komi=0.5)
+        first = (Player, {'playouts': 20})
+        second = (Player, {'playouts': 40})
+        results = list(run_games(first, second, rules, 4, workers=2,
+                                 max_moves=6))
+        self.assertEqual(sorted((k, first_black) for k, first_black, record
+                                in results),
+                         [(0, True), (1, False), (2, True), (3, False)])
+        for k, first_black, record in results:
+            self.assertEqual((record.rows, record.cols), (3, 3))
+            self.assertEqual(record.moves[0][0], BLACK)
+            self.assertLessEqual(len(record.moves), 6)
+
+if __name__ == '__main__':
+    unittest.main()
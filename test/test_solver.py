@@ -0,0 +1,89 @@
+import time
+import unittest
+
+from util.board import *
+from util.array_board import ArrayBoard
+from omnomnom.solver import *
+
+B = BLACK
+W = WHITE
+E = EMPTY
+
+class TestCaptureSolver(unittest.TestCase):
+    board_classes = (Board, ArrayBoard)
+
+    def make_board(self, board_class, size, stones):
+        board = board_class(size, size)
+        config = [[E] * size for i in range(size)]
+        for color, row, col in stones:
+            config[row][col] = color
+        board.set_config(config)
+        return board
+
+    def test_immediate_capture(self):
+        for board_class in self.board_classes:
+            board = self.make_board(board_class, 5, [(W, 0, 0), (B, 0, 1)])
+            solver = CaptureSolver(1)
+            mark = board.mark()
+
+            self.assertEqual(solver.solve(board, B), (True, (1,0)))
+            self.assertEqual(board.mark(), mark)
+
+    def test_edge_ladder(self):
+        for board_class in self.board_classes:
+            board = self.make_board(board_class, 5, [(W, 0, 0), (B, 0, 1)])
+            solver = CaptureSolver(1)
+
+            self.assertEqual(solver.solve(board, W), (False, None))
+            self.assertEqual(board.config[0][:2], [W, B])
+
+    def test_ladder(self):
+        for board_class in self.board_classes:
+            board = self.make_board(board_class, 9, [(W, 4, 4), (B, 5, 4),
+                                                     (B, 4, 3), (B, 3, 5)])
+            solver = CaptureSolver(1, max_nodes=20000)
+
+            result, move = solver.solve(board, B)
+            self.assertTrue(result)
+            self.assertIn(move, [(3,4), (4,5)])
+            self.assertEqual(solver.winning_move(board, B), move)
+
+    def test_node_budget(self):
+        board = self.make_board(Board, 9, [(W, 4, 4), (B, 5, 4), (B, 4, 3),
+                                           (B, 3, 5)])
+        solver = CaptureSolver(1, max_nodes=10)
+
+        self.assertEqual(solver.solve(board, B), (None, None))
+        self.assertLessEqual(solver.nodes, 10)
+        self.assertIsNone(solver.winning_move(board, W))
+
+    def test_deadline(self):
+        board = self.make_board(Board, 9, [(W, 4, 4), (B, 5, 4), (B, 4, 3),
+                                           (B, 3, 5)])
+        solver = CaptureSolver(1, max_nodes=20000)
+
+        self.assertEqual(solver.solve(board, B, deadline=time.monotonic()),
+                         (None, None))
+        self.assertLessEqual(solver.nodes, 1)
+
+    def test_visited(self):
+        board = self.make_board(Board, 5, [(W, 0, 0), (B, 0, 1)])
+        board.place(B, 1, 0)
+        visited = set([board.get_hash()])
+        board.undo()
+        solver = CaptureSolver(1)
+
+        self.assertNotEqual(solver.winning_move(board, B, visited), (1,0))
+
+    def test_visited_later(self):
+        board = self.make_board(Board, 5, [(W, 0, 0), (B, 0, 1)])
+        solver = CaptureSolver(1)
+        self.assertEqual(solver.winning_move(board, B), (1,0))
+
+        board.place(B, 1, 0)
+        visited = set([board.get_hash()])
+        board.undo()
+        self.assertNotEqual(solver.winning_move(board, B, visited), (1,0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import random
+import unittest
+
+from util.board import *
+from uiki.mcts import *
+from uiki.transposition import *
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_lru(self):
+        table = TranspositionTable(2)
+        a, b, c = Node(BLACK), Node(BLACK), Node(WHITE)
+        table.put((1, BLACK), a)
+        table.put((2, BLACK), b)
+        self.assertIs(table.get((1, BLACK)), a)
+        table.put((3, WHITE), c)
+
+        self.assertEqual(len(table), 2)
+        self.assertIsNone(table.get((2, BLACK)))
+        self.assertIs(table.get((1, BLACK)), a)
+        self.assertEqual(table.stats(), {'size': 2, 'capacity': 2, 'hits': 2,
+                                         'misses': 1, 'evictions': 1,
+                                         'hit_rate': 2/3})
+
+    def test_search(self):
+        board = Board(3,3)
+        m = MCTS(2000, lambda x: int(x>0), 1.0, table_size=10000)
+
+        self.assertEqual(m.search(board, set(), BLACK)[0], (1,1))
+        self.assertGreater(m.table.hits, 0)
+
+        parents = {}
+        nodes = [m.root]
+        seen = set()
+        while nodes:
+            node = nodes.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            for move, child in node.children.items():
+                parents.setdefault(id(child), set()).add(id(node))
+                nodes.append(child)
+        self.assertTrue(any(len(p) > 1 for p in parents.values()))
+
+    def test_pass_not_shared(self):
+        board = Board(2,2)
+        m = MCTS(500, lambda x: int(x>0), 1.0, table_size=10000)
+        m.search(board, set(), BLACK)
+
+        for node in m.table.nodes.values():
+            self.assertIsNot(node, m.root.children.get(PASS))
+
+    def test_proven_elsewhere(self):
+        board = Board(2,2)
+        m = MCTS(1, lambda x: int(x>0), 1.0, table_size=100)
+        m.set_root(BLACK)
+        m.root.expand(board)
+        for move in list(m.root.untried):
+            m.root.add_child(move).proven = -1
+            m.update_tree([move], -1)
+        self.assertIsNone(m.root.proven)
+
+        node, moves, outcome, proven = m.simulate_tree(board.clone(), set())
+        self.assertIs(node, m.root)
+        self.assertEqual((moves, outcome, proven), ([], -1, True))
+        self.assertEqual(m.root.proven, -1)
+
+    def test_shared_repetition(self):
+        board = Board(2,2)
+        m = MCTS(1, lambda x: int(x>0), 1.0, table_size=100)
+        m.set_root(BLACK)
+        m.root.expand(board)
+        after = board.clone()
+        after.place(BLACK, 0, 0)
+        shared = m.child(m.root, (0,0), after)
+        self.assertIs(m.table.get((after.get_hash(), WHITE, after.ko_move,
+                                   after.ko_color, 0, 0)), shared)
+        m.update_tree([(0,0)], 0)
+        for move in list(m.root.untried):
+            m.root.add_child(move).proven = -1
+            m.update_tree([move], -1)
+
+        visited = set([after.get_hash()])
+        node, moves, outcome, proven = m.simulate_tree(board.clone(), visited)
+        self.assertIs(node, shared)
+        self.assertEqual((moves, outcome, proven), ([(0,0)], -1, False))
+
+    def test_no_cycles(self):
+        random.seed(0)
+        m = MCTS(1000, lambda x: int(x>0), 1.0, table_size=1000)
+        m.search(Board(2,2), set(), BLACK)
+
+        # Depth-first walk: a child already on the path would be a cycle.
+        path = [m.root]
+        on_path = set([id(m.root)])
+        done = set()
+        children = [iter(list(m.root.children.values()))]
+        while children:
+            child = next(children[-1], None)
+            if child is None:
+                node = path.pop()
+                on_path.remove(id(node))
+                done.add(id(node))
+                children.pop()
+                continue
+            self.assertNotIn(id(child), on_path)
+            if id(child) not in done:
+                path.append(child)
+                on_path.add(id(child))
+                children.append(iter(list(child.children.values())))
+
+    def test_ko_key(self):
+        board = Board(3,4)
+        board.set_config([[EMPTY, BLACK, WHITE, EMPTY],
+                          [BLACK, WHITE, EMPTY, WHITE],
+                          [EMPTY, BLACK, WHITE, EMPTY]])
+        board.place(BLACK, 1, 2)
+        self.assertEqual(board.ko_move, (1,1))
+        m = MCTS(1, lambda x: int(x>0), 1.0, table_size=100)
+        m.set_root(BLACK)
+        child = m.child(m.root, (1,2), board)
+        key = (board.get_hash(), WHITE, (1,1), WHITE, 1, 0)
+        self.assertIs(m.table.get(key), child)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,263 @@
+import math
+
+import numpy as np
+
+from util.const import *
+from util.board import opponent
+from .mcts import *
+
+class ArrayTree:
+    '''Search tree stored as parallel NumPy arrays.
+
+    Node i has a visit count, a value sum, a parent and the move leading to
+    it (row*cols+col, or -1 for PASS). All children of a node are allocated
+    together when it is expanded, so they occupy the contiguous slice
+    first[i]:first[i]+num_children[i]. Arrays grow geometrically.
+    '''
+    def __init__(self, cols, capacity=1024):
+        self.cols = cols
+        self.size = 0
+        self.count = np.zeros(capacity, dtype=np.int32)
+        self.total = np.zeros(capacity, dtype=np.float64)
+        self.parent = np.zeros(capacity, dtype=np.int32)
+        self.first = np.zeros(capacity, dtype=np.int32)
+        self.num_children = np.zeros(capacity, dtype=np.int32)
+        self.move = np.zeros(capacity, dtype=np.int16)
+
+    def __len__(self):
+        return self.size
+
+    def nbytes(self):
+        '''Memory held by the arrays, including unused capacity.'''
+        return sum(a.nbytes for a in (self.count, self.total, self.parent,
+                                      self.first, self.num_children, self.move))
+
+    def reserve(self, n):
+        '''Allocate n new nodes and return the index of the first one.'''
+        start = self.size
+        if start + n > len(self.count):
+            capacity = len(self.count)
+            while capacity < start + n:
+                capacity *= 2
+            for name in ('count', 'total', 'parent', 'first',
+                         'num_children', 'move'):
+                old = getattr(self, name)
+                new = np.zeros(capacity, dtype=old.dtype)
+                new[:start] = old[:start]
+                setattr(self, name, new)
+        self.size += n
+        self.count[start:self.size] = 0
+        self.total[start:self.size] = 0.0
+        self.first[start:self.size] = -1
+        self.num_children[start:self.size] = 0
+        return start
+
+    def add_root(self):
+        i = self.reserve(1)
+        self.parent[i] = -1
+        self.move[i] = -1
+        return i
+
+    def expand(self, i, moves):
+        '''Allocate the children of node i, one per move.'''
+        n = len(moves)
+        start = self.reserve(n)
+        self.first[i] = start
+        self.num_children[i] = n
+        self.parent[start:start+n] = i
+        self.move[start:start+n] = [self.encode(move) for move in moves]
+
+    def encode(self, move):
+        if move == PASS:
+            return -1
+        return move[0]*self.cols + move[1]
+
+    def decode(self, code):
+        if code < 0:
+            return PASS
+        return divmod(int(code), self.cols)
+
+    def child_values(self, i, sign, c):
+        '''UCB values of the children of node i.'''
+        a = self.first[i]
+        b = a + self.num_children[i]
+        counts = self.count[a:b]
+        values = sign * self.total[a:b] / np.maximum(counts, 1)
+        if c != 0:
+            values += c * np.sqrt(math.log(self.count[i]+1) / (counts+1))
+        return values
+
+    def select_child(self, i, sign, c):
+        return self.first[i] + int(np.argmax(self.child_values(i, sign, c)))
+
+    def find_child(self, i, move):
+        if self.first[i] < 0:
+            return -1
+        a = self.first[i]
+        b = a + self.num_children[i]
+        found = np.flatnonzero(self.move[a:b] == self.encode(move))
+        return a + int(found[0]) if len(found) > 0 else -1
+
+    def subtree(self, root, min_count=0):
+        '''Return a new tree holding a copy of the subtree below root.
+
+        Children of nodes other than root with fewer than min_count visits
+        are left out.
+        '''
+        tree = ArrayTree(self.cols, max(1024, len(self.count)))
+        new_root = tree.add_root()
+        tree.count[new_root] = self.count[root]
+        tree.total[new_root] = self.total[root]
+        tree.move[new_root] = self.move[root]
+        queue = [(root, new_root)]
+        while queue:
+            old, new = queue.pop()
+            if self.first[old] < 0:
+                continue
+            if old != root and self.count[old] < min_count:
+                continue
+            a = self.first[old]
+            n = self.num_children[old]
+            start = tree.reserve(n)
+            tree.first[new] = start
+            tree.num_children[new] = n
+            tree.parent[start:start+n] = new
+            for name in ('count', 'total', 'move'):
+                getattr(tree, name)[start:start+n] = getattr(self, name)[a:a+n]
+            for k in np.flatnonzero(self.first[a:a+n] >= 0):
+                queue.append((a+int(k), start+int(k)))
+        return tree
+
+class ArrayMCTS(MCTS):
+    '''MCTS over an ArrayTree instead of linked Node objects.
+
+    Selection at each node is one vectorized argmax over its child slice,
+    with the same UCB formula as Node.select_move.
+    '''
+    def __init__(self, num_sims, score_func, exp_const, early_stop=False,
+                 stop_bound=None, max_nodes=0):
+        super(ArrayMCTS, self).__init__(num_sims, score_func, exp_const,
+                                        early_stop=early_stop,
+                                        stop_bound=stop_bound,
+                                        max_nodes=max_nodes)
+        self.tree = None
+        self.root_color = None
+        self.root_turn = None
+
+    def set_root(self, color, root_color=None):
+        # Values are kept from root_color's point of view, with root_turn
+        # to move at the root.
+        if root_color is None:
+            root_color = color
+        if self.tree is None or self.root_color != root_color or \
+           self.root_turn != color:
+            self.tree = None
+        self.root_color = root_color
+        self.root_turn = color
+
+    def search(self, board, visited, color, deadline=None, root_color=None):
+        self.set_root(color, root_color)
+        if self.tree is None:
+            self.tree = ArrayTree(board.cols)
+            self.root = self.tree.add_root()
+        return super(ArrayMCTS, self).search(board, visited, color, deadline,
+                                             root_color)
+
+    def tree_full(self):
+        return self.max_nodes > 0 and len(self.tree) >= self.max_nodes
+
+    def prune(self):
+        '''Copy the tree without the children of low-visit nodes.'''
+        threshold = 2
+        while len(self.tree) > self.max_nodes // 2 and \
+              threshold <= 2 * self.tree.count[self.root]:
+            self.tree = self.tree.subtree(self.root, threshold)
+            self.root = 0
+            threshold *= 2
+
+    def tree_stats(self):
+        if self.tree is None:
+            return {'nodes': 0, 'bytes': 0}
+        return {'nodes': len(self.tree), 'bytes': self.tree.nbytes()}
+
+    def ranked_moves(self, board):
+        tree = self.tree
+        if tree.first[self.root] < 0:
+            tree.expand(self.root, list(self.possible_moves(board, self.root_turn)))
+        sign = 1 if self.root_turn == self.root_color else -1
+        values = tree.child_values(self.root, sign, 0)
+        a = tree.first[self.root]
+        order = np.argsort(-values, kind='stable')
+        return [tree.decode(tree.move[a+k]) for k in order]
+
+    def root_stats(self):
+        tree = self.tree
+        a = tree.first[self.root]
+        if a < 0:
+            return {}
+        b = a + tree.num_children[self.root]
+        return dict((tree.decode(tree.move[i]),
+                     (float(tree.total[i]), int(tree.count[i])))
+                    for i in range(a, b) if tree.count[i] > 0)
+
+    def root_expanded(self):
+        tree = self.tree
+        a = tree.first[self.root]
+        return a >= 0 and tree.count[a:a+tree.num_children[self.root]].all()
+
+    def root_solved(self):
+        '''The array tree keeps no proofs, so the root is never solved.'''
+        return False
+
+    def possible_moves(self, board, color):
+        '''Legal moves and PASS, merging moves equivalent by symmetry as
+        Node.possible_moves does, with the same blind spot for superko.'''
+        moves = board.legal_moves(color)
+        for pos in board.symmetry.unique_moves(moves,
+                                               board.fixing_symmetries()):
+            yield pos
+        yield PASS
+
+    def simulate(self, board, visited):
+        tree = self.tree
+        path = [self.root]
+        outcome = None
+
+        i = self.root
+        color = self.root_turn
+        while tree.count[i] > 0 and outcome is None:
+            if tree.first[i] < 0:
+                if self.tree_full():
+                    break
+                tree.expand(i, list(self.possible_moves(board, color)))
+            sign = 1 if color == self.root_color else -1
+            i = tree.select_child(i, sign, self.exp_const)
+            path.append(i)
+            move = tree.decode(tree.move[i])
+            if move != PASS:
+                outcome = self.place_move(board, color, move, visited)
+            color = opponent(color)
+
+        if outcome is None:
+            outcome = self.simulate_default(board, color, visited,
+                                            self.max_depth)
+        self.update_tree(path, outcome)
+
+    def update_tree(self, path, outcome):
+        value = self.score_func(outcome)
+        self.tree.count[path] += 1
+        self.tree.total[path] += value
+
+    def move_root(self, color, move):
+        if self.tree is None:
+            return
+
+        child = -1
+        if color == self.root_turn:
+            child = self.tree.find_child(self.root, move)
+        if child >= 0:
+            self.tree = self.tree.subtree(child)
+            self.root = 0
+            self.root_turn = opponent(color)
+        else:
+            self.tree = None
@@ -0,0 +1,74 @@
+from util.const import *
+
+class Clock:
+    '''Game clock with Canadian byo-yomi, as described by GTP time_settings.
+
+    The time left for each color comes from GTP time_left when the
+    controller sends it, and is otherwise tracked from the time spent on
+    each move. allot() splits the remaining time over the expected rest of
+    the game and keeps a hard safety margin so replies are never late. Only
+    min_time is taken out of the margin when less than the margin is left,
+    and never more than half the time left, so that the search still gets
+    to run.
+    '''
+    def __init__(self, margin=0.5, min_moves=10, min_time=0.1):
+        self.margin = margin
+        self.min_moves = min_moves
+        self.min_time = min_time
+        self.set_time_settings(0, 0, 0)
+
+    def set_time_settings(self, main_time, byo_yomi_time, byo_yomi_stones):
+        self.main_time = main_time
+        self.byo_yomi_time = byo_yomi_time
+        self.byo_yomi_stones = byo_yomi_stones
+        self.reset()
+
+    def reset(self):
+        '''Restore the full main time for both colors.'''
+        self.time_left = {BLACK: self.main_time, WHITE: self.main_time}
+        self.stones_left = {BLACK: 0, WHITE: 0}
+        if self.main_time <= 0:
+            for color in (BLACK, WHITE):
+                self.enter_byo_yomi(color)
+
+    def set_time_left(self, color, time_left, stones_left):
+        self.time_left[color] = time_left
+        self.stones_left[color] = stones_left
+
+    def is_limited(self):
+        '''Whether the time settings limit the game at all.'''
+        return self.main_time > 0 or self.byo_yomi_stones > 0
+
+    def enter_byo_yomi(self, color):
+        self.time_left[color] += self.byo_yomi_time
+        self.stones_left[color] = self.byo_yomi_stones
+
+    def allot(self, color, board):
+        '''Return the seconds to spend on the next move, or None if unlimited.'''
+        if not self.is_limited():
+            return None
+
+        time_left = self.time_left[color]
+        if self.stones_left[color] > 0:
+            budget = time_left / self.stones_left[color]
+        else:
+            moves_left = max(self.min_moves, len(board.empties) // 2)
+            budget = time_left / moves_left
+            if self.byo_yomi_stones > 0:
+                per_stone = self.byo_yomi_time / self.byo_yomi_stones
+                budget = max(budget, per_stone)
+                time_left += per_stone
+
+        least = max(0.0, min(self.min_time, time_left / 2))
+        return max(least, min(budget, time_left) - self.margin)
+
+    def spend(self, color, seconds):
+        '''Charge the time taken by a move to color.'''
+        self.time_left[color] -= seconds
+        if self.stones_left[color] > 0:
+            self.stones_left[color] -= 1
+            if self.stones_left[color] == 0 and self.time_left[color] >= 0:
+                self.time_left[color] = 0
+                self.enter_byo_yomi(color)
+        elif self.time_left[color] <= 0 and self.byo_yomi_stones > 0:
+            self.enter_byo_yomi(color)
@@ -1,108 +1,704 @@
+import sys
 import math
-import copy
-import random
+import time
+import threading
 
 from util.const import *
 from util.board import *
+from .transposition import *
+
+STOP_INTERVAL = 10
+
+class VisitedStates:
+    '''Repetition set layered over the game history.
+
+    Lookups check the game history and a scratch layer. Additions only go to
+    the scratch layer, which clear() empties between simulations, so the
+    history itself is never copied or modified.
+    '''
+    def __init__(self, history):
+        self.history = history
+        self.scratch = set()
+
+    def __contains__(self, state):
+        return state in self.scratch or state in self.history
+
+    def __len__(self):
+        return len(self.history) + len(self.scratch)
+
+    def add(self, state):
+        self.scratch.add(state)
+
+    def clear(self):
+        self.scratch.clear()
+
+def move_priors(board, color, moves, last_move=None):
+    '''Score moves cheaply for progressive widening, higher is better.
+
+    Captures and escapes from atari score highest, moves within two points
+    of the last move get a bonus, and moves on the first line lose points,
+    twice over in the corners. PASS comes last.
+    '''
+    priors = {}
+    near = last_move is not None and last_move != PASS
+    for move in moves:
+        if move == PASS:
+            priors[move] = -10
+            continue
+        row, col = move
+        score = 0
+        if near:
+            distance = max(abs(row - last_move[0]), abs(col - last_move[1]))
+            if distance < 3:
+                score += 3 - distance
+        if row == 0 or row == board.rows-1:
+            score -= 2
+        if col == 0 or col == board.cols-1:
+            score -= 2
+        priors[move] = score
+    for owner, bonus in ((opponent(color), 10), (color, 6)):
+        for group in board.groups(owner, 1):
+            for move in board.group_liberties(group):
+                if move in priors:
+                    priors[move] += bonus
+    return priors
 
 class Node:
+    '''A position in the search tree, with color to move.
+
+    proven is None while the result of the position is unknown, otherwise
+    the exact outcome for the root color: 1 for a win and -1 for a loss.
+    '''
+    __slots__ = ('color', 'total', 'count', 'children', 'moves', 'untried',
+                 'amaf', 'proven')
+
     def __init__(self, color):
         self.color = color
         self.total = 0.0;
         self.count = 0;
         self.children = {}
+        self.moves = None
+        self.untried = None
+        self.amaf = {}
+        self.proven = None
 
     def update(self, value):
         self.total += value
         self.count += 1
 
+    def update_amaf(self, moves, value):
+        '''Add value to the all-moves-as-first statistics of moves.'''
+        amaf = self.amaf
+        for move in moves:
+            stats = amaf.get(move)
+            if stats is None:
+                amaf[move] = [value, 1]
+            else:
+                stats[0] += value
+                stats[1] += 1
+
     def value(self):
         return self.total / self.count
 
     def possible_moves(self, board):
-        for pos in board.legal_moves(self.color):
+        '''Legal moves and PASS, one move per class of equivalent moves.
+
+        When a rotation or reflection leaves the position unchanged, moves
+        that it maps onto each other lead to equivalent positions, so only
+        the first of them is kept. Only the stones are compared: the
+        positions visited before, which superko forbids, need not be
+        symmetric. The kept move may then be a repetition while one it
+        stands for is not, or the other way round, and the search only
+        ever sees the kept one.
+        '''
+        moves = board.legal_moves(self.color)
+        for pos in board.symmetry.unique_moves(moves,
+                                               board.fixing_symmetries()):
             yield pos
         yield PASS
 
-    def move_values(self, board, root_color, c):
+    def expand(self, board, last_move=None, prior=False):
+        '''Compute the move list the first time the node is selected from.
+
+        With prior=True the moves are ranked by move_priors, best first,
+        and untried moves are handed out in that order.
+        '''
+        if self.moves is None:
+            moves = list(self.possible_moves(board))
+            if prior:
+                priors = move_priors(board, self.color, moves, last_move)
+                moves.sort(key=lambda move:-priors[move])
+            self.moves = moves
+            self.untried = [move for move in reversed(self.moves)
+                            if move not in self.children]
+
+    def width(self, widening):
+        '''Number of moves considered under progressive widening.'''
+        if widening <= 0:
+            return None
+        return 1 + int(widening * math.sqrt(self.count))
+
+    def prove(self, root_color):
+        '''Mark the node proven if its children decide it.
+
+        One child won for the color to move proves a win, and all moves
+        tried and lost prove a loss. Return whether the node is proven.
+        '''
+        if self.proven is not None:
+            return True
+        sign = 1 if self.color == root_color else -1
+        all_lost = self.moves is not None and not self.untried
+        for child in self.children.values():
+            if child.proven == sign:
+                self.proven = sign
+                return True
+            if child.proven != -sign:
+                all_lost = False
+        if all_lost:
+            self.proven = -sign
+        return all_lost
+
+    def add_child(self, move, child=None):
+        if child is None:
+            child = Node(opponent(self.color))
+        self.children[move] = child
+        if self.untried and self.untried[-1] == move:
+            self.untried.pop()
+        elif self.untried is not None and move in self.untried:
+            self.untried.remove(move)
+        return child
+
+    def move_values(self, board, root_color, c, rave=0, widening=0,
+                    last_move=None):
+        '''Return the UCB value of every move.
+
+        With rave > 0, the mean value of each move is blended with its
+        all-moves-as-first value, with weight sqrt(rave / (3*count + rave))
+        on the latter. Moves with neither kind of statistics get the
+        exploration term alone. With widening > 0, only the first
+        width(widening) moves by prior are scored. Proven children are
+        worth infinity, positive if they win for the color to move.
+        '''
+        self.expand(board, last_move, widening > 0)
+        sign = 1 if self.color == root_color else -1
+        log_count = math.log(self.count+1)
+        unvisited = c * math.sqrt(log_count)
         values = {}
-        for pos in self.possible_moves(board):
-            if pos in self.children:
-                child = self.children[pos]
-                v = child.value()
-                if self.color != root_color:
-                    v = -v
-                values[pos] = v + c * math.sqrt(
-                                math.log(self.count+1) / (child.count+1) )
+        for pos in self.moves[:self.width(widening)]:
+            child = self.children.get(pos)
+            if child is not None and child.proven is not None:
+                values[pos] = sign * child.proven * math.inf
+                continue
+            count = child.count if child is not None else 0
+            value = child.total / count if count > 0 else None
+            if rave > 0 and pos in self.amaf:
+                total, amaf_count = self.amaf[pos]
+                if value is None:
+                    value = total / amaf_count
+                else:
+                    beta = math.sqrt(rave / (3*count + rave))
+                    value = beta * total / amaf_count + (1-beta) * value
+            if value is None:
+                values[pos] = unvisited
             else:
-                values[pos] = c * math.sqrt(math.log(self.count+1))
+                values[pos] = sign * value + c * math.sqrt(
+                                log_count / (count+1) )
         return values
 
-    def select_move(self, board, root_color, c):
-        values = self.move_values(board, root_color, c)
-        return max(values, key=lambda move:values[move])
+    def select_move(self, board, root_color, c, rave=0, widening=0,
+                    last_move=None):
+        '''Return the move with the highest UCB value.
+
+        Only children that have been visited are scored. All untried moves
+        share the same value, so the next one stands in for all of them.
+        With RAVE they do not, and every move is scored. With widening > 0,
+        moves are ranked by prior and an untried move is only opened while
+        the node has fewer than width(widening) children. Proven children
+        are skipped, and an untried move is opened when nothing else is
+        left.
+        '''
+        if rave > 0:
+            values = self.move_values(board, root_color, c, rave, widening,
+                                      last_move)
+            for move, child in self.children.items():
+                if child.proven is not None:
+                    values.pop(move, None)
+            if values:
+                return max(values, key=values.get)
+            return self.untried[-1] if self.untried else None
 
-    def select_moves(self, board, root_color, c):
-        values = self.move_values(board, root_color, c)
+        self.expand(board, last_move, widening > 0)
+        sign = 1 if self.color == root_color else -1
+        log_count = math.log(self.count+1)
+        best = None
+        best_value = -math.inf
+        for move, child in self.children.items():
+            if child.proven is not None:
+                continue
+            v = sign * child.total / child.count + c * math.sqrt(
+                    log_count / (child.count+1) )
+            if v > best_value:
+                best, best_value = move, v
+        width = self.width(widening)
+        if self.untried and (best is None or
+                             (width is None or len(self.children) < width)
+                             and c * math.sqrt(log_count) > best_value):
+            best = self.untried[-1]
+        return best
+
+    def select_moves(self, board, root_color, c, rave=0):
+        values = self.move_values(board, root_color, c, rave)
         return sorted(values, key=lambda move:-values[move])
 
 class MCTS:
-    def __init__(self, num_sims, score_func, exp_const):
+    # Captures that win the game, 0 when it is scored by area.
+    num_caps = 0
+
+    def __init__(self, num_sims, score_func, exp_const, threads=1,
+                 early_stop=False, stop_bound=None, rave=0, table_size=0,
+                 max_nodes=0, widening=0, cache=None):
         self.num_sims = num_sims
         self.score_func = score_func
         self.exp_const = exp_const
+        self.threads = threads
+        self.rave = rave
+        self.widening = widening
+        self.last_move = None
+        self.table = TranspositionTable(table_size) if table_size > 0 else None
+        self.cache = cache
+        self.seeded = {}
+        self.max_nodes = max_nodes
+        self.num_nodes = 0
+        self.early_stop = early_stop
+        self.stop_bound = stop_bound
+        self.playouts_saved = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
         self.root = None
+        self.root_color = None
+
+    def search(self, board, visited, color, deadline=None, root_color=None):
+        '''Search from the given position and return the ranked moves.
+
+        color is the side to move. Node values are kept from root_color's
+        point of view, color's by default, so a player pondering on the
+        opponent's turn keeps its own point of view and its tree stays
+        valid for its next move.
+
+        Runs num_sims playouts, or as many as fit before deadline (a
+        time.monotonic() value) when one is given. Setting self.stopped
+        from another thread ends the search early, and so does proving the
+        result of the root. A new root is seeded from the opening cache, if
+        any.
+        '''
+        self.max_depth = len(visited) + board.size()*2
+        self.set_root(color, root_color)
+        if self.tree_full():
+            self.prune()
+        if self.cache is not None and self.root.count == 0 and \
+           self.root_color == color:
+            self.seed_root(board, self.cache.lookup(board, color,
+                                                    self.num_caps))
+        self.start_time = time.monotonic()
+
+        if self.threads > 1:
+            self.search_threads(board, visited, deadline)
+        else:
+            board = board.clone()
+            start = board.mark()
+            v = VisitedStates(visited)
+            k = 0
+            while self.keep_searching(k, deadline, board):
+                self.simulate(board, v)
+                board.rewind_to(start)
+                v.clear()
+                k += 1
+            self.num_playouts = k
+
+        return self.ranked_moves(board)
+
+    def keep_searching(self, k, deadline, board):
+        '''Whether to start playout number k from board.'''
+        if self.stopped.is_set():
+            return False
+        remaining = self.remaining_playouts(k, deadline)
+        if remaining <= 0:
+            return False
+        if self.root_solved():
+            if remaining < math.inf:
+                self.playouts_saved += int(remaining)
+            return False
+        if k % STOP_INTERVAL == 0 and remaining < math.inf and \
+           self.can_stop(remaining, board):
+            self.playouts_saved += int(remaining)
+            return False
+        return True
+
+    def remaining_playouts(self, k, deadline):
+        '''Playouts left in the budget, estimated from the rate so far
+        when the search runs to a deadline.'''
+        if deadline is None:
+            return self.num_sims - k
+        now = time.monotonic()
+        if now >= deadline:
+            return 0
+        if k == 0 or now <= self.start_time:
+            return math.inf
+        return k * (deadline - now) / (now - self.start_time)
+
+    def can_stop(self, remaining, board):
+        '''Whether the remaining playouts cannot change the best root move.
+
+        The best child is the one with the best mean value, blended with
+        its AMAF value under RAVE as in ranked_moves. With early_stop, the
+        search ends when the best child also leads every other child by
+        more visits than there are playouts left. With stop_bound, it ends
+        when every root move has been tried and the lower confidence bound
+        of the best child is above the upper bound of all others. The
+        bounds are the mean plus or minus stop_bound standard deviations,
+        for values in [0, 1].
+        '''
+        if not self.early_stop and self.stop_bound is None:
+            return False
+        stats = self.root_stats()
+        if not stats:
+            return False
+        if self.rave > 0:
+            values = self.root.move_values(board, self.root_color, 0,
+                                           self.rave)
+            best = max(stats, key=values.get)
+        else:
+            best = max(stats, key=lambda move: stats[move][0] / stats[move][1])
+        total, count = stats.pop(best)
+
+        if self.early_stop:
+            runner_up = max([c for t, c in stats.values()] + [0])
+            if count - runner_up > remaining:
+                return True
+
+        if self.stop_bound is not None and self.root_expanded():
+            lower = total / count - self.stop_bound * 0.5 / math.sqrt(count)
+            if all(t / c + self.stop_bound * 0.5 / math.sqrt(c) < lower
+                   for t, c in stats.values()):
+                return True
+        return False
+
+    def root_expanded(self):
+        '''Whether every root move has been tried.'''
+        return self.root.moves is not None and not self.root.untried
 
-    def search(self, board, visited, color):
-        max_depth = board.size()*2
+    def seed_root(self, board, stats):
+        '''Add statistics {move: (total, count)} to the children of the root.
+
+        On a symmetric position, a move that possible_moves merged into an
+        equivalent one is credited to the one the root kept. Other moves that
+        are not among the root moves are ignored. The seeded statistics are
+        remembered, so that update_cache only adds what the search itself
+        found.
+        '''
+        root = self.root
+        root.expand(board, self.last_move, self.widening > 0)
+        fixing = board.fixing_symmetries() if stats else []
+        self.seeded = {}
+        for move, (total, count) in stats.items():
+            if move not in root.moves:
+                images = [board.symmetry.transform(move, t) for t in fixing]
+                images = [image for image in images if image in root.moves]
+                if not images:
+                    continue
+                move = images[0]
+            child = root.children.get(move)
+            if child is None:
+                child = root.add_child(move)
+                self.num_nodes += 1
+            child.total += total
+            child.count += count
+            root.total += total
+            root.count += count
+            seeded_total, seeded_count = self.seeded.get(move, (0.0, 0))
+            self.seeded[move] = (seeded_total + total, seeded_count + count)
+
+    def update_cache(self, board):
+        '''Add the root statistics of the last search to the opening cache.
+
+        board must still be at the root position. Seeded statistics are left
+        out, and the root is only added once.
+        '''
+        if self.cache is None or not self.cache.writable:
+            return
+        stats = {}
+        for move, (total, count) in self.root_stats().items():
+            seeded_total, seeded_count = self.seeded.get(move, (0.0, 0))
+            if count > seeded_count:
+                stats[move] = (total - seeded_total, count - seeded_count)
+        self.cache.add(board, self.root_color, stats, self.num_caps)
+        self.seeded = dict(self.root_stats())
+
+    def root_solved(self):
+        '''Whether the result of the root position is proven.'''
+        return self.root.proven is not None
+
+    def search_threads(self, board, visited, deadline=None):
+        '''Run the playouts on several threads sharing one tree.
+
+        Each thread plays on its own board and repetition layer. Tree steps
+        and updates take self.lock, while playouts run unlocked, so the
+        playouts only run in parallel on a free-threaded Python build.
+        Virtual loss steers concurrent threads onto different branches.
+        '''
+        self.num_playouts = 0
+
+        def worker():
+            b = board.clone()
+            start = b.mark()
+            v = VisitedStates(visited)
+            while True:
+                with self.lock:
+                    if not self.keep_searching(self.num_playouts, deadline,
+                                               b):
+                        return
+                    self.num_playouts += 1
+                self.simulate(b, v)
+                b.rewind_to(start)
+                v.clear()
+
+        threads = [threading.Thread(target=worker) for i in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def set_root(self, color, root_color=None):
+        # Node values are kept from the root color's point of view, so the
+        # tree and the table are dropped when it changes.
+        if root_color is None:
+            root_color = color
+        if root_color != self.root_color:
+            if self.table is not None:
+                self.table.clear()
+            self.root = None
+        self.root_color = root_color
         if self.root is None or self.root.color != color:
             self.root = Node(color)
+            self.num_nodes = 1
+            self.seeded = {}
+
+    def tree_full(self):
+        '''Whether the tree has reached its node budget.'''
+        return self.max_nodes > 0 and self.num_nodes >= self.max_nodes
+
+    def prune(self):
+        '''Shrink the tree to at most half of its node budget.
+
+        Subtrees below nodes with fewer than a threshold of visits are cut,
+        doubling the threshold until the tree is small enough or only the
+        children of the root are left. Cut nodes keep their own statistics
+        and are expanded again if the search comes back to them. The
+        transposition table is cleared, since it would otherwise keep the
+        cut nodes alive.
+        '''
+        threshold = 2
+        while self.num_nodes > self.max_nodes // 2 and \
+              threshold <= 2 * self.root.count:
+            nodes = list(self.root.children.values())
+            seen = set()
+            while nodes:
+                node = nodes.pop()
+                if id(node) in seen:
+                    continue
+                seen.add(id(node))
+                if node.count < threshold:
+                    node.children = {}
+                    node.moves = None
+                    node.untried = None
+                    node.amaf = {}
+                else:
+                    nodes.extend(node.children.values())
+            self.num_nodes = len(self.tree_nodes())
+            threshold *= 2
+        if self.table is not None:
+            self.table.clear()
+
+    def tree_nodes(self):
+        '''Return the nodes reachable from the root, each once.'''
+        seen = {}
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if id(node) not in seen:
+                seen[id(node)] = node
+                nodes.extend(node.children.values())
+        return list(seen.values())
 
-        for k in range(self.num_sims):
-            b = copy.deepcopy(board)
-            v = copy.copy(visited)
-            node, moves, outcome = self.simulate_tree(b, v)
-            if outcome is None:
-                outcome = self.simulate_default(b, node.color, v, max_depth)
-            self.update_tree(moves, outcome)
+    def tree_stats(self):
+        '''Return the live node count and the approximate tree memory in bytes.'''
+        if self.root is None:
+            return {'nodes': 0, 'bytes': 0}
+        nodes = self.tree_nodes()
+        size = 0
+        for node in nodes:
+            size += sys.getsizeof(node) + sys.getsizeof(node.children) + \
+                    sys.getsizeof(node.amaf) + 72 * len(node.amaf)
+            if node.moves is not None:
+                size += sys.getsizeof(node.moves) + sys.getsizeof(node.untried)
+        return {'nodes': len(nodes), 'bytes': size}
+
+    def ranked_moves(self, board):
+        '''Return the root moves, best first.
 
-        return self.root.select_moves(board, self.root.color, 0)
+        Moves are ranked by value, as in select_moves with no exploration,
+        but moves the search never visited only come after the visited
+        ones, so that under RAVE the move played is one can_stop compared.
+        Proven losses still come last.
+        '''
+        values = self.root.move_values(board, self.root_color, 0, self.rave)
+        children = self.root.children
+        def key(move):
+            visited = move in children and children[move].count > 0
+            return (values[move] == -math.inf, not visited, -values[move])
+        return sorted(values, key=key)
+
+    def simulate(self, board, visited):
+        '''Run one playout from the root and back up its outcome.'''
+        node, moves, outcome, proven = self.simulate_tree(board, visited)
+        played = [] if self.rave > 0 else None
+        if outcome is None:
+            outcome = self.simulate_default(board, node.color, visited,
+                                            self.max_depth, played)
+        self.update_tree(moves, outcome, played, proven)
 
     def simulate_tree(self, board, visited):
+        '''Walk down the tree, adding one node, and return the last node,
+        the moves to it, the exact outcome of the game there, if known, and
+        whether the outcome proves the last node.
+
+        The outcome is known when a move ends the game or the walk reaches
+        a proven node. A move back to a node already on the path repeats
+        its position, so the walk ends before it with a repetition outcome
+        that proves nothing. Neither does a repetition into a child shared
+        through the transposition table, since other paths reach it. A node
+        whose children were all proven through other parents has nothing
+        left to select, and is proven on the spot.
+        '''
         moves = []
         outcome = None
+        proven = False
 
         node = self.root
-        while node.count > 0 and outcome is None:
-            move = node.select_move(board, self.root.color, self.exp_const)
+        path = set([id(node)])
+        leaf = node.count == 0
+        while not leaf and outcome is None:
+            with self.lock:
+                if node.proven is not None:
+                    outcome = node.proven
+                    proven = True
+                    break
+                move = node.select_move(board, self.root_color,
+                                        self.exp_const, self.rave,
+                                        self.widening,
+                                        moves[-1] if moves else self.last_move)
+                if move is None:
+                    if node.prove(self.root_color):
+                        outcome = node.proven
+                        proven = True
+                    break
+                new = move not in node.children
+                if new and self.tree_full():
+                    break
             moves.append(move)
 
-            if move not in node.children:
-                node.children[move] = Node(opponent(node.color))
-            child = node.children[move]
-
             if move != PASS:
                 outcome = self.place_move(board, node.color, move, visited)
 
+            with self.lock:
+                child = self.child(node, move, board, path, outcome is None)
+                if id(child) in path:
+                    moves.pop()
+                    if outcome is None:
+                        outcome = self.repeat_outcome(node.color)
+                    break
+                path.add(id(child))
+                proven = outcome is not None and (
+                    self.table is None or new or
+                    board.get_hash() not in visited)
+                leaf = child.count == 0
+                if self.threads > 1:
+                    child.update(self.virtual_loss(node.color))
+
             node = child
 
-        return node, moves, outcome
+        return node, moves, outcome, proven
+
+    def child(self, node, move, board, path=(), share=True):
+        '''Return the child of node for move, which has just been played.
+
+        New children are looked up in the transposition table, if any, so
+        that transposed positions share one node. PASS children are never
+        shared, since two passes would lead back to the same entry. Neither
+        are children when share is False, as after a repetition, which
+        depends on the path, nor table nodes whose ids are in path, which
+        would close a cycle. The key includes the ko state, which decides
+        the legal moves, and the capture counts. Every move that is not a
+        pass adds a stone to the board or to the captures, so keyed nodes
+        can never lead back to themselves.
+        '''
+        child = node.children.get(move)
+        if child is not None:
+            return child
+        if self.table is None or move == PASS or not share:
+            self.num_nodes += 1
+            return node.add_child(move)
+
+        key = (board.get_hash(), opponent(node.color), board.ko_move,
+               board.ko_color, board.captures[BLACK], board.captures[WHITE])
+        child = self.table.get(key)
+        if child is not None and id(child) not in path:
+            return node.add_child(move, child)
+        self.num_nodes += 1
+        if child is None:
+            child = node.add_child(move)
+            self.table.put(key, child)
+            return child
+        return node.add_child(move)
 
-    def simulate_default(self, board, color, visited, max_depth):
+    def virtual_loss(self, color):
+        '''Value that makes a child look lost to the player choosing it.'''
+        return self.score_func(-1 if color == self.root_color else 1)
+
+    def simulate_default(self, board, color, visited, max_depth, played=None):
+        '''Play random moves to the end of the game and return the outcome.
+
+        The playout ends when both sides pass in a row, which the default
+        policy does once only moves into its own eyes are left, and the
+        position is then scored by final_score. The (color, move) pairs
+        played are appended to played, if given.
+        '''
         outcome = None
-        while len(visited) < max_depth and outcome is None:
+        passes = 0
+        while len(visited) < max_depth and outcome is None and passes < 2:
             move = self.default_move(board, color)
-            outcome = self.place_move(board, color, move, visited)
+            if played is not None:
+                played.append((color, move))
+            if move == PASS:
+                board.place(color, move[0], move[1])
+                passes += 1
+            else:
+                outcome = self.place_move(board, color, move, visited)
+                passes = 0
             color = opponent(color)
 
         if outcome is None:
-            return board.score(self.root.color)
+            return self.final_score(board)
         else:
             return outcome
 
+    def final_score(self, board):
+        '''Score a finished playout for the root color.'''
+        return board.area_score(self.root_color)
+
     def place_move(self, board, color, move, visited):
         board.place(color, move[0], move[1])
-        state = board.get_state()
+        state = board.get_hash()
         if state in visited:
             outcome = self.repeat_outcome(color)
         else:
@@ -111,31 +707,86 @@ class MCTS:
         return outcome
 
     def default_move(self, board, color):
-        if board.atari_block is not None:
-            return list(board.atari_block.free_neighbors)[0]
-        else:
-            positions = list(board.legal_moves(color))
-            if len(positions) > 0:
-                return random.choice(positions)
-            else:
-                return PASS
+        '''Capture a group in atari, else save one, else play at random.'''
+        for owner in (opponent(color), color):
+            for group in board.groups(owner, 1):
+                move = board.group_liberties(group)[0]
+                if board.is_legal(color, move[0], move[1]) and \
+                   not board.is_eye(color, move[0], move[1]):
+                    return move
+        return board.random_legal_move(color, fill_eyes=False)
+
+    def update_tree(self, moves, outcome, played=None, proven=False):
+        '''Back up the outcome of a playout along moves from the root.
 
-    def update_tree(self, moves, outcome):
+        A proven outcome marks the last node on the path as solved and
+        proofs are then propagated towards the root for as long as they
+        decide the parent.
+        '''
         value = self.score_func(outcome)
-        self.root.update(value)
-        node = self.root
+        with self.lock:
+            self.root.update(value)
+            node = self.root
+            path = [node]
+            for move in moves:
+                parent, node = node, node.children[move]
+                path.append(node)
+                if self.threads > 1:
+                    node.total += value - self.virtual_loss(parent.color)
+                else:
+                    node.update(value)
+            if played is not None:
+                self.update_amaf(path, moves, played, value)
+            if proven:
+                self.prove_path(path, outcome)
+
+    def prove_path(self, path, outcome):
+        '''Mark the last node of path as decided by outcome and propagate.'''
+        path[-1].proven = 1 if outcome > 0 else -1
+        for node in reversed(path[:-1]):
+            if not node.prove(self.root_color):
+                break
+
+    def update_amaf(self, path, moves, played, value):
+        '''Credit value to every move played after each node on the path.
+
+        A node gets the moves played by its own color from its turn on,
+        each counted once, whether in the tree or in the playout.
+        '''
+        color = self.root.color
+        sequence = []
         for move in moves:
-            node = node.children[move]
-            node.update(value)
+            sequence.append((color, move))
+            color = opponent(color)
+        sequence.extend(played)
+
+        after = {BLACK: set(), WHITE: set()}
+        j = len(sequence)
+        for i in range(len(path)-1, -1, -1):
+            while j > i:
+                j -= 1
+                color, move = sequence[j]
+                if move != PASS:
+                    after[color].add(move)
+            path[i].update_amaf(after[path[i].color], value)
+
+    def root_stats(self):
+        '''Return {move: (total, count)} for the visited children of the root.'''
+        return dict((move, (child.total, child.count))
+                    for move, child in self.root.children.items())
 
     def repeat_outcome(self, color):
-        return -1 if color==self.root.color else 1
+        return -1 if color==self.root_color else 1
 
     def move_root(self, color, move):
+        self.last_move = move
+        self.seeded = {}
         if self.root is None:
             return
 
         if color == self.root.color and move in self.root.children:
             self.root = self.root.children[move]
+            if self.max_nodes > 0:
+                self.num_nodes = len(self.tree_nodes())
         else:
             self.root = None
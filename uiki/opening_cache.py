@@ -0,0 +1,196 @@
+import os
+import mmap
+import struct
+
+from util.const import *
+
+MAGIC = b'UIKIBOOK'
+VERSION = 1
+# magic, version, number of slots, moves per slot
+HEADER = struct.Struct('<8sIII')
+# canonical hash, rows, cols, color to move, suicide allowed, num_caps,
+# black captures, white captures, komi, number of moves
+SLOT_HEAD = struct.Struct('<QBBBBHBBfH')
+# move index row*cols+col or PASS_CODE, visit count, total value
+MOVE = struct.Struct('<HIf')
+PASS_CODE = 0xffff
+MAX_COUNT = 0xffffffff
+PROBES = 16
+COLOR_CODES = {BLACK: 1, WHITE: 2}
+
+class OpeningCache:
+    '''Root statistics of searched positions in a file shared by processes.
+
+    The file is a fixed-size open-addressing table, with linear probing
+    from the position hash. Each slot holds the key of one position and the
+    visit count and total value of its most visited root moves. Lookups go
+    through a read-only memory map, so any number of engine processes can
+    share one file without loading it.
+
+    Positions are keyed by their canonical hash under the board symmetries,
+    with moves stored in the canonical orientation, so all rotations and
+    reflections of a position share one slot. The key also holds the color
+    to move, the board size, komi, suicide_allowed, num_caps and the
+    capture counts. Only positions fewer than depth moves into the board
+    history are cached.
+
+    A writable cache adds the statistics of finished searches to the file,
+    creating it with the given number of slots if needed. Only one process
+    should write to a file at a time.
+    '''
+    def __init__(self, path, writable=False, slots=1<<16, max_moves=24,
+                 max_visits=1000, depth=40):
+        if writable and not os.path.exists(path):
+            self.create(path, slots, max_moves)
+        self.path = path
+        self.writable = writable
+        self.max_visits = max_visits
+        self.depth = depth
+        self.file = open(path, 'r+b' if writable else 'rb')
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self.map = mmap.mmap(self.file.fileno(), 0, access=access)
+        magic, version, self.slots, self.max_moves = \
+            HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('{0} is not an opening cache'.format(path))
+        self.slot_size = SLOT_HEAD.size + self.max_moves * MOVE.size
+
+    @staticmethod
+    def create(path, slots, max_moves):
+        '''Write an empty cache file.'''
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, slots, max_moves))
+            f.truncate(HEADER.size +
+                       slots * (SLOT_HEAD.size + max_moves * MOVE.size))
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __len__(self):
+        '''Number of positions in the cache.'''
+        return sum(1 for i in range(self.slots)
+                   if self.map[self.offset(i) + 8] != 0)
+
+    def offset(self, i):
+        return HEADER.size + i * self.slot_size
+
+    def key(self, board, color, num_caps):
+        '''Return (hash, symmetry, key fields) of the position.'''
+        hash, t = board.canonical_hash()
+        komi = struct.unpack('<f', struct.pack('<f', board.komi))[0]
+        fields = (board.rows, board.cols, COLOR_CODES[color],
+                  int(board.suicide_allowed), num_caps,
+                  min(board.captures[BLACK], 255),
+                  min(board.captures[WHITE], 255), komi)
+        return hash, t, fields
+
+    def find(self, hash, fields):
+        '''Return the slot of the position, or the first empty slot after
+        it, or None when neither is within PROBES slots.'''
+        start = hash % self.slots
+        for k in range(PROBES):
+            i = (start + k) % self.slots
+            head = SLOT_HEAD.unpack_from(self.map, self.offset(i))
+            if head[1] == 0:
+                return i
+            if head[0] == hash and head[1:9] == fields:
+                return i
+        return None
+
+    def read(self, i):
+        '''Return {code: (total, count)} for the moves in slot i.'''
+        offset = self.offset(i)
+        head = SLOT_HEAD.unpack_from(self.map, offset)
+        if head[1] == 0:
+            return {}
+        stats = {}
+        offset += SLOT_HEAD.size
+        for k in range(min(head[9], self.max_moves)):
+            code, count, total = MOVE.unpack_from(self.map, offset)
+            stats[code] = (total, count)
+            offset += MOVE.size
+        return stats
+
+    def encode(self, move, t, symmetry, cols):
+        move = symmetry.transform(move, t)
+        return PASS_CODE if move == PASS else move[0]*cols + move[1]
+
+    def decode(self, code, t, symmetry, cols):
+        move = PASS if code == PASS_CODE else divmod(code, cols)
+        return symmetry.untransform(move, t)
+
+    def lookup(self, board, color, num_caps=0):
+        '''Return the cached root statistics {move: (total, count)}.
+
+        The statistics are scaled down to at most max_visits visits in
+        total, so that a search seeded from them can still change its mind.
+        Positions not in the cache give {}.
+        '''
+        if board.mark() >= self.depth:
+            return {}
+        hash, t, fields = self.key(board, color, num_caps)
+        i = self.find(hash, fields)
+        if i is None:
+            return {}
+        stats = self.read(i)
+        visits = sum(count for total, count in stats.values())
+        scale = min(1.0, self.max_visits / visits) if visits > 0 else 0
+        result = {}
+        for code, (total, count) in stats.items():
+            scaled = int(count * scale)
+            if scaled > 0:
+                move = self.decode(code, t, board.symmetry, board.cols)
+                result[move] = (total * scaled / count, scaled)
+        return result
+
+    def add(self, board, color, stats, num_caps=0):
+        '''Add root statistics {move: (total, count)} of a search.
+
+        The cached moves keep the sum of their statistics, and the
+        max_moves most visited moves are stored. When the probed slots are
+        all taken, the one with the fewest visits gives way if the new
+        position has more.
+        '''
+        if not self.writable:
+            raise ValueError('opening cache is read-only')
+        if board.mark() >= self.depth or not stats:
+            return
+        hash, t, fields = self.key(board, color, num_caps)
+        i = self.find(hash, fields)
+        merged = {}
+        if i is None:
+            i = self.victim(hash)
+            if self.visits(i) >= sum(count for total, count in stats.values()):
+                return
+        else:
+            merged = self.read(i)
+        for move, (total, count) in stats.items():
+            code = self.encode(move, t, board.symmetry, board.cols)
+            old_total, old_count = merged.get(code, (0.0, 0))
+            merged[code] = (old_total + total,
+                            min(old_count + count, MAX_COUNT))
+
+        moves = sorted(merged, key=lambda code: -merged[code][1])
+        moves = moves[:self.max_moves]
+        offset = self.offset(i)
+        SLOT_HEAD.pack_into(self.map, offset, hash, *(fields + (len(moves),)))
+        offset += SLOT_HEAD.size
+        for code in moves:
+            total, count = merged[code]
+            MOVE.pack_into(self.map, offset, code, count, total)
+            offset += MOVE.size
+
+    def visits(self, i):
+        return sum(count for total, count in self.read(i).values())
+
+    def victim(self, hash):
+        '''Return the probed slot with the fewest visits.'''
+        start = hash % self.slots
+        slots = [(start + k) % self.slots for k in range(PROBES)]
+        return min(slots, key=self.visits)
+
+    def flush(self):
+        if self.writable:
+            self.map.flush()
@@ -0,0 +1,65 @@
+from util.const import *
+from .mcts import *
+
+def search_worker(task):
+    '''Run one search in a pool worker and return its root statistics,
+    playouts run and playouts saved.'''
+    mcts_class, args, kwargs, board, visited, color, deadline = task
+    mcts = mcts_class(*args, **kwargs)
+    mcts.search(board, visited, color, deadline)
+    return mcts.root_stats(), mcts.num_playouts, mcts.playouts_saved
+
+class RootParallelMCTS:
+    '''Root-parallel search over a multiprocessing pool.
+
+    Every worker searches its share of num_sims playouts from the same
+    position on a tree of its own. The root children statistics of all
+    workers are summed and ranked like a single search, and so are the
+    playouts run and saved, as MCTS reports them. Trees are rebuilt
+    for every move, so move_root does nothing. Root-parallel searches get
+    no opening cache, so update_cache does nothing either.
+    '''
+    def __init__(self, pool, workers, mcts_class, num_sims, *args, **kwargs):
+        self.pool = pool
+        self.workers = workers
+        self.mcts_class = mcts_class
+        self.num_sims = num_sims
+        self.args = args
+        self.kwargs = kwargs
+        self.num_playouts = 0
+        self.playouts_saved = 0
+        self.root = None
+        self.root_color = None
+
+    def search(self, board, visited, color, deadline=None):
+        board = board.clone()
+        tasks = []
+        for k in range(self.workers):
+            sims = self.num_sims // self.workers
+            if k < self.num_sims % self.workers:
+                sims += 1
+            tasks.append((self.mcts_class, (sims,) + self.args, self.kwargs,
+                          board, visited, color, deadline))
+
+        self.root = Node(color)
+        self.root_color = color
+        self.num_playouts = 0
+        for stats, num_playouts, playouts_saved in self.pool.map(search_worker,
+                                                                 tasks):
+            self.num_playouts += num_playouts
+            self.playouts_saved += playouts_saved
+            for move, (total, count) in stats.items():
+                if move not in self.root.children:
+                    self.root.add_child(move)
+                child = self.root.children[move]
+                child.total += total
+                child.count += count
+                self.root.count += count
+
+        return self.root.select_moves(board, color, 0)
+
+    def move_root(self, color, move):
+        pass
+
+    def update_cache(self, board):
+        pass
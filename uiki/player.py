@@ -1,53 +1,165 @@
-import copy
+import math
+import time
+import threading
+import random
+import multiprocessing
 
 from util.const import *
 from util.board import *
 from .mcts import *
+from .parallel import *
+from .clock import *
+
+def win_score(outcome):
+    return int(outcome > 0)
 
 class Player:
     __name__ = 'Uiki'
     __version__ = '0.2'
 
-    def __init__(self, playouts=1000):
+    def __init__(self, playouts=1000, board_class=Board, mcts_class=MCTS,
+                 workers=1, threads=1, ponder=False, early_stop=False,
+                 stop_bound=None, rave=0, table_size=0, max_nodes=0,
+                 widening=0, cache=None):
         self.playouts = playouts
+        self.board_class = board_class
+        self.mcts_class = mcts_class
+        self.workers = workers
+        self.threads = threads
+        self.pool = None
+        self.clock = Clock()
+        self.ponder = ponder
+        self.ponder_thread = None
+        self.early_stop = early_stop
+        self.stop_bound = stop_bound
+        self.rave = rave
+        self.table_size = table_size
+        self.max_nodes = max_nodes
+        self.widening = widening
+        self.cache = cache
 
     def new_game(self, rows, cols, komi=6.5, suicide_allowed=False, pass_allowed=True):
-        self.board = Board(rows, cols, komi, suicide_allowed)
+        self.stop_pondering()
+        self.board = self.board_class(rows, cols, komi, suicide_allowed)
         self.pass_allowed = pass_allowed
         self.states_visited = set()
+        self.clock.reset()
+        if self.workers > 1 and self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers, random.seed)
         self.init_mcts(BLACK)
 
     def init_mcts(self, color):
-        self.mcts = MCTS(self.playouts, lambda x: int(x>0), 1.0)
+        self.mcts = self.make_mcts(self.mcts_class, win_score, 1.0)
+
+    def make_mcts(self, mcts_class, *args):
+        '''Create the search, root-parallel if the player has workers.'''
+        kwargs = {}
+        if self.threads > 1:
+            kwargs['threads'] = self.threads
+        if self.early_stop:
+            kwargs['early_stop'] = True
+        if self.stop_bound is not None:
+            kwargs['stop_bound'] = self.stop_bound
+        if self.rave > 0:
+            kwargs['rave'] = self.rave
+        if self.table_size > 0:
+            kwargs['table_size'] = self.table_size
+        if self.max_nodes > 0:
+            kwargs['max_nodes'] = self.max_nodes
+        if self.widening > 0:
+            kwargs['widening'] = self.widening
+        if self.cache is not None and self.pool is None:
+            kwargs['cache'] = self.cache
+        if self.pool is not None:
+            return RootParallelMCTS(self.pool, self.workers, mcts_class,
+                                    self.playouts, *args, **kwargs)
+        return mcts_class(self.playouts, *args, **kwargs)
+
+    def start_pondering(self, color):
+        '''Keep searching for color in a background thread.
+
+        The thread grows the current tree until stop_pondering is called,
+        so the search for the next move starts from its statistics. It
+        keeps values from the player's own point of view, the opponent of
+        color. Trees of root-parallel searches are not kept, so they do
+        not ponder.
+        '''
+        if not self.ponder or self.pool is not None:
+            return
+        self.ponder_thread = threading.Thread(
+            target=self.mcts.search,
+            args=(self.board, self.states_visited, color, math.inf,
+                  opponent(color)))
+        self.ponder_thread.daemon = True
+        self.ponder_thread.start()
+
+    def stop_pondering(self):
+        '''Stop the background search, if any, and wait for it to end.'''
+        if self.ponder_thread is None:
+            return
+        self.mcts.stopped.set()
+        self.ponder_thread.join()
+        self.mcts.stopped.clear()
+        self.ponder_thread = None
+
+    def close(self):
+        '''Stop pondering and shut down the worker pool, if any.'''
+        self.stop_pondering()
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
 
     def reset_game(self):
+        self.stop_pondering()
         self.board.reset()
         self.states_visited = set()
+        self.clock.reset()
         self.init_mcts(BLACK)
 
     def set_komi(self, komi):
+        self.stop_pondering()
         self.board.set_komi(komi)
 
+    def set_time_settings(self, main_time, byo_yomi_time, byo_yomi_stones):
+        self.clock.set_time_settings(main_time, byo_yomi_time, byo_yomi_stones)
+
+    def set_time_left(self, color, time_left, stones_left):
+        self.clock.set_time_left(color, time_left, stones_left)
+
     def place_move(self, color, row, col):
         '''Place a given move on the board and return True if move is legal.
            Return False if move is illegal.'''
+        self.stop_pondering()
         if self.board[row,col] != EMPTY:
             return False
 
         self.board.place(color, row, col)
-        newstate = self.board.get_state()
+        newstate = self.board.get_hash()
         self.states_visited.add(newstate)
         self.mcts.move_root(color, (row, col))
         return True
 
     def gen_move(self, color):
-        moves = self.mcts.search(self.board, self.states_visited, color)
-        move =  self.make_move(color, moves)
+        self.stop_pondering()
+        start = time.monotonic()
+        budget = self.clock.allot(color, self.board)
+        deadline = None if budget is None else start + budget
+
+        move = self.choose_move(color, deadline)
         if move != RESIGN:
             self.mcts.move_root(color, move)
 
+        self.clock.spend(color, time.monotonic() - start)
+        if move != RESIGN:
+            self.start_pondering(opponent(color))
         return move
 
+    def choose_move(self, color, deadline):
+        '''Search until deadline and play the best legal move, or RESIGN.'''
+        moves = self.mcts.search(self.board, self.states_visited, color, deadline)
+        self.mcts.update_cache(self.board)
+        return self.make_move(color, moves)
+
     def make_move(self, color, moves):
         for move in moves:
             if move == PASS:
@@ -56,20 +168,20 @@ class Player:
                 else:
                     continue
 
-            board = copy.deepcopy(self.board)
-            board.place(color, move[0], move[1])
+            mark = self.board.mark()
+            self.board.place(color, move[0], move[1])
 
-            state = board.get_state()
+            state = self.board.get_hash()
             if state in self.states_visited:
+                self.board.rewind_to(mark)
                 continue
 
-            self.board = board
             self.states_visited.add(state)
             return move
         return RESIGN
 
     def place_pass(self, color):
-        pass
+        self.stop_pondering()
 
     def show_board(self):
         return str(self.board)
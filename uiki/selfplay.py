@@ -0,0 +1,124 @@
+import random
+import multiprocessing
+
+from util.const import *
+from util.board import *
+from util.game_record import *
+
+def new_game(player, rules):
+    '''Start a game of the given rules, with num_caps for capture go only.'''
+    kwargs = dict(rows=rules.rows, cols=rules.cols, komi=rules.komi,
+                  suicide_allowed=rules.suicide_allowed)
+    if rules.num_caps > 0:
+        kwargs['num_caps'] = rules.num_caps
+    player.new_game(**kwargs)
+
+def play_game(black, white, rules, max_moves=None):
+    '''Play one game between two players and return its GameRecord.
+
+    rules is a GameRecord giving the size, komi and rules, and the new
+    record copies them. A referee board checks every move. The game
+    ends after two passes in a row, a resignation, an illegal move, a
+    capture win when num_caps > 0 or max_moves moves, by default three
+    per point.
+    '''
+    if max_moves is None:
+        max_moves = 3 * rules.rows * rules.cols
+    players = {BLACK: black, WHITE: white}
+    for player in players.values():
+        new_game(player, rules)
+    board = Board(rules.rows, rules.cols, rules.komi, rules.suicide_allowed)
+    record = GameRecord(rules.rows, rules.cols, rules.komi,
+                        rules.suicide_allowed, rules.num_caps)
+
+    color = BLACK
+    passes = 0
+    while True:
+        if len(record.moves) >= max_moves:
+            record.set_result(*final_result(board, rules, 'limit'))
+            break
+        move = players[color].gen_move(color)
+        other = players[opponent(color)]
+        if move == RESIGN:
+            record.set_result(opponent(color), 'resign',
+                              final_result(board, rules)[2])
+            break
+        record.add_move(color, move)
+        if move == PASS:
+            other.place_pass(color)
+            passes += 1
+            if passes == 2:
+                record.set_result(*final_result(board, rules))
+                break
+        else:
+            passes = 0
+            if not board.is_legal(color, move[0], move[1]) or \
+               not other.place_move(color, move[0], move[1]):
+                record.set_result(opponent(color), 'illegal',
+                                  final_result(board, rules)[2])
+                break
+            board.place(color, move[0], move[1])
+            if 0 < rules.num_caps <= board.captures[color]:
+                record.set_result(color, 'captures', board.score(BLACK))
+                break
+        color = opponent(color)
+    return record
+
+def final_result(board, rules, reason='score'):
+    '''Return (winner, reason, score) of a finished game.
+
+    Capture go is scored by captures, and go by area, for black.
+    '''
+    if rules.num_caps > 0:
+        score = board.score(BLACK)
+    else:
+        score = board.area_score(BLACK)
+    winner = BLACK if score > 0 else WHITE if score < 0 else None
+    return winner, reason, score
+
+def game_worker(task):
+    '''Play one game in a pool worker and return its record.
+
+    Players are created from (class, kwargs) specs inside the worker, so
+    nothing but the specs and the record crosses the process boundary.
+    '''
+    black_spec, white_spec, rules, max_moves, seed = task
+    random.seed(seed)
+    black = black_spec[0](**black_spec[1])
+    white = white_spec[0](**white_spec[1])
+    try:
+        return play_game(black, white, rules, max_moves)
+    finally:
+        black.close()
+        white.close()
+
+def run_games(first, second, rules, games, workers=1, max_moves=None,
+              seed=0):
+    '''Play a match and yield (k, first_is_black, record) as games finish.
+
+    first and second are (player class, kwargs) specs and swap colors every
+    game, first taking black in the even games. With workers > 1 the games
+    run in parallel on a process pool, so the players themselves should
+    search with a single worker and without pondering. Game k seeds the
+    random module with seed + k. Games can finish out of order with
+    workers > 1, so k tells which game each record is.
+    '''
+    tasks = []
+    for k in range(games):
+        specs = (first, second) if k % 2 == 0 else (second, first)
+        tasks.append(specs + (rules, max_moves, seed + k))
+
+    if workers > 1:
+        pool = multiprocessing.Pool(workers)
+        try:
+            for k, record in pool.imap_unordered(play_task, enumerate(tasks)):
+                yield k, k % 2 == 0, record
+        finally:
+            pool.terminate()
+    else:
+        for k, task in enumerate(tasks):
+            yield k, k % 2 == 0, game_worker(task)
+
+def play_task(item):
+    k, task = item
+    return k, game_worker(task)
@@ -0,0 +1,48 @@
+from collections import OrderedDict
+
+class TranspositionTable:
+    '''Bounded map from (position hash, color to move) to search nodes.
+
+    Nodes found here are shared by every path that reaches the position,
+    so they pool their statistics. When the table is full, the least
+    recently used entry is dropped. Its node stays in the tree but is no
+    longer shared with new paths.
+    '''
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.nodes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get(self, key):
+        node = self.nodes.get(key)
+        if node is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.nodes.move_to_end(key)
+        return node
+
+    def put(self, key, node):
+        self.nodes[key] = node
+        self.nodes.move_to_end(key)
+        if len(self.nodes) > self.capacity:
+            self.nodes.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.nodes.clear()
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def stats(self):
+        '''Return the size, capacity, hits, misses, evictions and hit rate.'''
+        return {'size': len(self.nodes), 'capacity': self.capacity,
+                'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hit_rate()}
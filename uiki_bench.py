@@ -0,0 +1,44 @@
+import time
+import argparse
+from util.const import *
+from util.boards import BOARDS
+from uiki.mcts import MCTS
+from uiki.player import win_score
+
+parser = argparse.ArgumentParser(
+    description="Measure Uiki search speed for 1 to N tree-parallel threads")
+parser.add_argument('-n', '--numplayouts', type=int, default=1000,
+                    help='Number of MCTS playouts per search.')
+parser.add_argument('-s', '--size', type=int, default=9,
+                    help='Board size.')
+parser.add_argument('-b', '--board', choices=sorted(BOARDS), default='array',
+                    help='Board engine.')
+parser.add_argument('--threads', type=int, default=4,
+                    help='Largest thread count to measure.')
+parser.add_argument('--table', type=int, default=0,
+                    help='Transposition table entries, 0 to disable.')
+parser.add_argument('--max-nodes', type=int, default=0,
+                    help='Node budget for the search tree, 0 for no limit.')
+parser.add_argument('--widening', type=float, default=0,
+                    help='Progressive widening factor, 0 to disable.')
+args = parser.parse_args()
+
+print('threads  playouts/s  speedup')
+base = None
+for threads in range(1, args.threads+1):
+    board = BOARDS[args.board](args.size, args.size, komi=6.5)
+    mcts = MCTS(args.numplayouts, win_score, 1.0, threads=threads,
+                table_size=args.table, max_nodes=args.max_nodes,
+                widening=args.widening)
+    start = time.time()
+    mcts.search(board, set(), BLACK)
+    rate = args.numplayouts / (time.time() - start)
+    if base is None:
+        base = rate
+    print('{0:7d}  {1:10.1f}  {2:7.2f}'.format(threads, rate, rate / base))
+    stats = mcts.tree_stats()
+    print('         tree: {0} nodes, {1:.1f} MB'.format(stats['nodes'],
+                                                      stats['bytes'] / 2**20))
+    if mcts.table is not None:
+        print('         table: size {size}/{capacity}, hit rate {hit_rate:.1%}, '
+              '{evictions} evictions'.format(**mcts.table.stats()))
@@ -1,8 +1,11 @@
 import sys
 import argparse
 from uiki.player import Player
+from uiki.mcts import MCTS
 from omnomnom.atari_player import AtariPlayer
+from uiki.opening_cache import OpeningCache
 from gtp.gtp_player import GtpPlayer
+from util.boards import BOARDS
 
 parser = argparse.ArgumentParser(description="Start Uiki in GTP mode")
 parser.add_argument('-p', '--player', default='uiki',
@@ -15,13 +18,88 @@ parser.add_argument('-s', '--size', type=int, default=19,
                     help='Board size.')
 parser.add_argument('-k', '--komi', type=float, default=6.5,
                     help='Komi.')
+parser.add_argument('-b', '--board', choices=sorted(BOARDS), default='array',
+                    help='Board engine.')
+parser.add_argument('-t', '--tree', choices=['node', 'array'], default='node',
+                    help='Search tree store (array requires numpy and the '
+                         'uiki player).')
+parser.add_argument('-w', '--workers', type=int, default=1,
+                    help='Number of processes for root-parallel search.')
+parser.add_argument('--threads', type=int, default=1,
+                    help='Number of threads sharing one search tree '
+                         '(node tree only).')
+parser.add_argument('--ponder', action='store_true',
+                    help="Keep searching during the opponent's turn.")
+parser.add_argument('--early-stop', action='store_true',
+                    help='Stop searching once the best move cannot change.')
+parser.add_argument('--stop-bound', type=float, default=None,
+                    help='Also stop once the best move is this many standard '
+                         'deviations ahead.')
+parser.add_argument('--rave', type=float, default=0,
+                    help='RAVE equivalence parameter, 0 to disable '
+                         '(node tree only).')
+parser.add_argument('--table', type=int, default=0,
+                    help='Transposition table entries, 0 to disable '
+                         '(node tree only).')
+parser.add_argument('--max-nodes', type=int, default=0,
+                    help='Node budget for the search tree, 0 for no limit.')
+parser.add_argument('--widening', type=float, default=0,
+                    help='Progressive widening factor, 0 to disable '
+                         '(node tree only).')
+parser.add_argument('--solver-nodes', type=int, default=5000,
+                    help='Node budget for the capture solver of omnomnom, '
+                         '0 to disable.')
+parser.add_argument('--cache', default=None,
+                    help='Opening cache file to seed searches from '
+                         '(node tree, one worker).')
+parser.add_argument('--cache-update', action='store_true',
+                    help='Add finished searches to the opening cache, '
+                         'creating the file if needed.')
 args = parser.parse_args()
+board_class = BOARDS[args.board]
+
+if args.tree == 'array' and args.player.lower() != 'uiki':
+    parser.error('--tree array needs the uiki player')
+if args.tree == 'array' and args.threads > 1:
+    parser.error('--threads needs the node tree')
+if args.tree == 'array' and args.rave > 0:
+    parser.error('--rave needs the node tree')
+if args.tree == 'array' and args.table > 0:
+    parser.error('--table needs the node tree')
+if args.tree == 'array' and args.widening > 0:
+    parser.error('--widening needs the node tree')
+if args.tree == 'array' and args.cache is not None:
+    parser.error('--cache needs the node tree')
+if args.workers > 1 and args.cache is not None:
+    parser.error('--cache needs a single worker')
+if args.cache_update and args.cache is None:
+    parser.error('--cache-update needs --cache')
+cache = None
+if args.cache is not None:
+    cache = OpeningCache(args.cache, writable=args.cache_update)
+if args.tree == 'array':
+    from uiki.array_tree import ArrayMCTS
+    mcts_class = ArrayMCTS
+else:
+    mcts_class = MCTS
 
 if args.player.lower() == 'uiki':
-    player = Player(playouts=args.numplayouts)
+    player = Player(playouts=args.numplayouts, board_class=board_class,
+                    mcts_class=mcts_class, workers=args.workers,
+                    threads=args.threads, ponder=args.ponder,
+                    early_stop=args.early_stop, stop_bound=args.stop_bound,
+                    rave=args.rave, table_size=args.table,
+                    max_nodes=args.max_nodes, widening=args.widening,
+                    cache=cache)
     player.new_game(rows=args.size, cols=args.size, komi=args.size)
 elif args.player.lower() == 'omnomnom':
-    player = AtariPlayer(playouts=args.numplayouts)
+    player = AtariPlayer(playouts=args.numplayouts, board_class=board_class,
+                         workers=args.workers, threads=args.threads,
+                         ponder=args.ponder, early_stop=args.early_stop,
+                         stop_bound=args.stop_bound, rave=args.rave,
+                         table_size=args.table, max_nodes=args.max_nodes,
+                         widening=args.widening,
+                         solver_nodes=args.solver_nodes, cache=cache)
     player.new_game(rows=args.size, cols=args.size, num_caps=args.numcaps, komi=args.size)
 else:
     raise ValueError('Unknown player {0}'.format(args.player))
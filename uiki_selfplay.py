@@ -0,0 +1,81 @@
+import os
+import time
+import argparse
+from uiki.player import Player
+from uiki.selfplay import run_games
+from omnomnom.atari_player import AtariPlayer
+from util.const import *
+from util.boards import BOARDS
+from util.game_record import GameRecord, append_records
+PLAYERS = {'uiki': Player, 'omnomnom': AtariPlayer}
+
+parser = argparse.ArgumentParser(
+    description="Play Uiki against itself, or two settings against each other")
+parser.add_argument('-g', '--games', type=int, default=10,
+                    help='Number of games.')
+parser.add_argument('-p', '--player', choices=sorted(PLAYERS), default='uiki',
+                    help='Computer player for both sides.')
+parser.add_argument('-n', '--numplayouts', type=int, default=1000,
+                    help='Number of MCTS playouts of the first player.')
+parser.add_argument('-m', '--numplayouts2', type=int, default=None,
+                    help='Number of MCTS playouts of the second player, '
+                         'the first one\'s by default.')
+parser.add_argument('-c', '--numcaps', type=int, default=1,
+                    help='Number of captures to win capture go (omnomnom).')
+parser.add_argument('-s', '--size', type=int, default=9,
+                    help='Board size.')
+parser.add_argument('-k', '--komi', type=float, default=6.5,
+                    help='Komi.')
+parser.add_argument('-b', '--board', choices=sorted(BOARDS), default='array',
+                    help='Board engine of the players.')
+parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                    help='Number of games played in parallel.')
+parser.add_argument('--max-moves', type=int, default=None,
+                    help='Moves before a game is scored as it stands, '
+                         'three per point by default.')
+parser.add_argument('--seed', type=int, default=0,
+                    help='Random seed of the first game.')
+parser.add_argument('-o', '--output', default=None,
+                    help='File to append the binary game records to.')
+parser.add_argument('--sgf', default=None,
+                    help='Directory to write an SGF file per game to.')
+
+def main():
+    args = parser.parse_args()
+
+    player_class = PLAYERS[args.player]
+    board_class = BOARDS[args.board]
+    first = (player_class, {'playouts': args.numplayouts,
+                            'board_class': board_class})
+    second = (player_class, {'playouts': args.numplayouts2 or args.numplayouts,
+                             'board_class': board_class})
+    num_caps = args.numcaps if args.player == 'omnomnom' else 0
+    rules = GameRecord(args.size, args.size, args.komi, num_caps=num_caps)
+    if args.sgf is not None and not os.path.isdir(args.sgf):
+        os.makedirs(args.sgf)
+
+    wins = [0, 0]
+    start = time.time()
+    for k, first_black, record in run_games(
+            first, second, rules, args.games, args.workers, args.max_moves,
+            args.seed):
+        first_color = BLACK if first_black else WHITE
+        if record.winner is not None:
+            wins[record.winner != first_color] += 1
+        if args.output is not None:
+            append_records(args.output, [record])
+        if args.sgf is not None:
+            with open(os.path.join(args.sgf, 'game{0:04d}.sgf'.format(k)), 'w') as f:
+                f.write(record.to_sgf())
+        print('game {0}: {1} in {2} moves, first player {3}'.format(
+            k, record.result(), len(record.moves),
+            'black' if first_black else 'white'))
+
+    elapsed = time.time() - start
+    print('first {0} - second {1}, {2} draws'.format(
+        wins[0], wins[1], args.games - sum(wins)))
+    print('{0:.1f} s, {1:.1f} games/hour'.format(elapsed,
+                                                 args.games * 3600 / elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,665 @@
+import random
+
+from .const import *
+from .board import Block, opponent
+from .zobrist import zobrist_table
+from .symmetry import symmetries
+
+EMPTY_CODE = 0
+BLACK_CODE = 1
+WHITE_CODE = 2
+BORDER_CODE = 3
+
+COLOR_CODES = {EMPTY: EMPTY_CODE, BLACK: BLACK_CODE, WHITE: WHITE_CODE}
+CODE_COLORS = (EMPTY, BLACK, WHITE, None)
+
+class Geometry:
+    '''Layout tables shared by every board of one size.
+
+    Points are indices into a (rows+2) x (cols+2) grid whose outer ring is
+    a sentinel border, so neighbor lookups never need bounds checks.
+    '''
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.stride = stride = cols + 2
+        self.length = (rows + 2) * stride
+        self.points = [(row+1)*stride + col+1
+                       for row in range(rows) for col in range(cols)]
+        self.row_points = [self.points[row*cols:(row+1)*cols]
+                           for row in range(rows)]
+
+        self.position = [None] * self.length
+        self.neighbors = [()] * self.length
+        self.diagonals = [()] * self.length
+        self.template = bytearray([BORDER_CODE]) * self.length
+        self.zobrist = [[0] * self.length for code in range(3)]
+        table = zobrist_table(rows, cols)
+        self.symmetry = symmetries(rows, cols)
+        self.symmetry_keys = [[0] * self.length for code in range(3)]
+        for i, p in enumerate(self.points):
+            self.zobrist[BLACK_CODE][p] = table[BLACK][i]
+            self.zobrist[WHITE_CODE][p] = table[WHITE][i]
+            self.symmetry_keys[BLACK_CODE][p] = self.symmetry.keys[BLACK][i]
+            self.symmetry_keys[WHITE_CODE][p] = self.symmetry.keys[WHITE][i]
+        for p in self.points:
+            row, col = divmod(p, stride)
+            self.position[p] = (row-1, col-1)
+            self.neighbors[p] = (p-stride, p-1, p+stride, p+1)
+            self.diagonals[p] = (p-stride-1, p-stride+1,
+                                 p+stride-1, p+stride+1)
+            self.template[p] = EMPTY_CODE
+
+    def point(self, row, col):
+        return (row+1)*self.stride + col+1
+
+_GEOMETRIES = {}
+
+def geometry(rows, cols):
+    '''Return the layout tables for the given board size.'''
+    key = (rows, cols)
+    if key not in _GEOMETRIES:
+        _GEOMETRIES[key] = Geometry(rows, cols)
+    return _GEOMETRIES[key]
+
+class ArrayBoard:
+    '''Board with the same interface as util.board.Board, kept in flat arrays.
+
+    Stones live in a padded bytearray. Each group is identified by the point
+    of one of its stones; group ids, liberty counts, group sizes and the
+    circular lists linking the stones of a group are flat lists indexed by
+    point, so playing a move allocates no tuples or sets.
+    '''
+    def __init__(self, rows, cols, komi=0.0, suicide_allowed=False):
+        self.rows = rows
+        self.cols = cols
+        self.geo = geometry(rows, cols)
+        self.set_komi(komi)
+        self.suicide_allowed = suicide_allowed
+        self.reset()
+
+    def __str__(self):
+        return '{0}\nBlack: {1}\nWhite: {2}\n'.format(
+                    '\n'.join(map(lambda x:''.join(x), reversed(self.config))),
+                    self.captures[BLACK], self.captures[WHITE])
+
+    def __getitem__(self, position):
+        row, col = position
+        return CODE_COLORS[self.stones[self.geo.point(row, col)]]
+
+    def reset(self):
+        '''Reset the board.'''
+        length = self.geo.length
+        self.stones = bytearray(self.geo.template)
+        self.group = [0] * length
+        self.next_stone = [0] * length
+        self.libs = [0] * length
+        self.group_size = [0] * length
+        self.marks = [0] * length
+        self.mark_id = 0
+        self.captures = {BLACK: 0, WHITE: 0}
+        self.ko_point = 0
+        self.ko_color = None
+        self.atari_group = 0
+        self.hash = 0
+        self.symmetry_hash = 0
+        self.history = []
+        self.empties = self.geo.points[:]
+        self.empty_index = [0] * length
+        for i, p in enumerate(self.empties):
+            self.empty_index[p] = i
+        self._blocks = None
+        self.liberty_groups = [None, [set(), set(), set(), set()],
+                               [set(), set(), set(), set()]]
+        self.liberty_bucket = [None] * length
+
+    def clone(self):
+        '''Return an independent copy of the board, without its undo history.'''
+        board = self.__class__.__new__(self.__class__)
+        board.rows = self.rows
+        board.cols = self.cols
+        board.geo = self.geo
+        board.komi = self.komi
+        board.suicide_allowed = self.suicide_allowed
+        board.stones = self.stones[:]
+        board.group = self.group[:]
+        board.next_stone = self.next_stone[:]
+        board.libs = self.libs[:]
+        board.group_size = self.group_size[:]
+        board.marks = [0] * self.geo.length
+        board.mark_id = 0
+        board.captures = dict(self.captures)
+        board.ko_point = self.ko_point
+        board.ko_color = self.ko_color
+        board.atari_group = self.atari_group
+        board.hash = self.hash
+        board.symmetry_hash = self.symmetry_hash
+        board.history = []
+        board.empties = self.empties[:]
+        board.empty_index = self.empty_index[:]
+        board._blocks = None
+        board.liberty_groups = [None]
+        board.liberty_bucket = [None] * self.geo.length
+        for buckets in self.liberty_groups[1:]:
+            copies = [set(bucket) for bucket in buckets]
+            board.liberty_groups.append(copies)
+            for bucket in copies:
+                for g in bucket:
+                    board.liberty_bucket[g] = bucket
+        return board
+
+    def __copy__(self):
+        return self.clone()
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    @property
+    def config(self):
+        stones = self.stones
+        return [[CODE_COLORS[stones[p]] for p in points]
+                for points in self.geo.row_points]
+
+    @property
+    def symmetry(self):
+        return self.geo.symmetry
+
+    @property
+    def ko_move(self):
+        return self.geo.position[self.ko_point] if self.ko_point else None
+
+    @property
+    def blocks(self):
+        '''Mapping from stone position to Block, built on demand.'''
+        if self._blocks is None:
+            blocks = {}
+            for p in self.geo.points:
+                g = self.group[p]
+                if g and self.geo.position[g] not in blocks:
+                    block = self.make_block(g)
+                    for pos in block.members:
+                        blocks[pos] = block
+            self._blocks = blocks
+        return self._blocks
+
+    @property
+    def atari_block(self):
+        if self.atari_group == 0:
+            return None
+        if self._blocks is None:
+            return self.make_block(self.atari_group)
+        return self.blocks[self.geo.position[self.atari_group]]
+
+    def make_block(self, g):
+        position = self.geo.position
+        block = Block()
+        for s in self.group_stones(g):
+            block.members.add(position[s])
+            for n in self.geo.neighbors[s]:
+                if self.stones[n] == EMPTY_CODE:
+                    block.free_neighbors.add(position[n])
+        return block
+
+    def set_komi(self, komi):
+        '''Set the komi.'''
+        self.komi = komi
+
+    def allow_suicide(self, allowed):
+        '''Change setting for whether multi-stone suicide is allowed.'''
+        self.suicide_allowed = allowed
+
+    def set_config(self, config):
+        self.reset()
+        for i in range(self.rows):
+            for j in range(self.cols):
+                if config[i][j] != EMPTY:
+                    self.place(config[i][j], i, j)
+
+    def size(self):
+        '''Number of intersections on the board.'''
+        return self.rows * self.cols
+
+    def get_state(self):
+        '''Return a hashable representation of board configuration.'''
+        stones = self.stones
+        return ''.join([CODE_COLORS[stones[p]] for p in self.geo.points])
+
+    def get_hash(self):
+        '''Return the Zobrist hash of the board configuration.'''
+        return self.hash
+
+    def canonical_hash(self):
+        '''Return the smallest hash over the rotations and reflections, as
+        Board.canonical_hash.'''
+        return self.geo.symmetry.canonical(self.symmetry_hash)
+
+    def fixing_symmetries(self):
+        '''Symmetries, other than the identity, that leave the position unchanged.'''
+        return self.geo.symmetry.fixing(self.symmetry_hash)
+
+    def score(self, color):
+        '''Return score for given color.'''
+        black_score = self.captures[BLACK] - self.captures[WHITE] - self.komi
+        if color == BLACK:
+            return black_score
+        else:
+            return -black_score
+
+    def area_score(self, color):
+        '''Return the area score for given color, as Board.area_score.'''
+        stones = self.stones
+        neighbors = self.geo.neighbors
+        area = [0, 0, 0, 0]
+        for p in self.geo.points:
+            area[stones[p]] += 1
+
+        self.mark_id += 1
+        mark = self.mark_id
+        marks = self.marks
+        for p in self.empties:
+            if marks[p] == mark:
+                continue
+            marks[p] = mark
+            region = [p]
+            borders = 0
+            for q in region:
+                for n in neighbors[q]:
+                    s = stones[n]
+                    if s == EMPTY_CODE:
+                        if marks[n] != mark:
+                            marks[n] = mark
+                            region.append(n)
+                    elif s != BORDER_CODE:
+                        borders |= s
+            if borders == BLACK_CODE or borders == WHITE_CODE:
+                area[borders] += len(region)
+
+        black_score = area[BLACK_CODE] - area[WHITE_CODE] - self.komi
+        if color == BLACK:
+            return black_score
+        else:
+            return -black_score
+
+    def empty_positions(self):
+        '''Iterator over empty positions.'''
+        stones = self.stones
+        position = self.geo.position
+        for p in self.geo.points:
+            if stones[p] == EMPTY_CODE:
+                yield position[p]
+
+    def is_legal(self, color, row, col):
+        '''Check if a move is legal, with the same rules as Board.is_legal.'''
+        p = self.geo.point(row, col)
+        if p == self.ko_point and color == self.ko_color:
+            return False
+        return self.is_legal_point(COLOR_CODES[color], p)
+
+    def is_legal_point(self, c, p):
+        stones = self.stones
+        group = self.group
+        libs = self.libs
+        o = 3 - c
+        for n in self.geo.neighbors[p]:
+            s = stones[n]
+            if s == EMPTY_CODE:
+                return True
+            if s == o and libs[group[n]] == 1:
+                return True
+            if s == c and (self.suicide_allowed or libs[group[n]] != 1):
+                return True
+        return False
+
+    def is_eye(self, color, row, col):
+        '''Check if an empty point is a single-point true eye of color.'''
+        p = self.geo.point(row, col)
+        c = COLOR_CODES[color]
+        return self.stones[p] == EMPTY_CODE and self.is_eye_point(c, p)
+
+    def is_eye_point(self, c, p):
+        stones = self.stones
+        for n in self.geo.neighbors[p]:
+            if stones[n] != c and stones[n] != BORDER_CODE:
+                return False
+        o = 3 - c
+        opponents = 0
+        edge = 0
+        for d in self.geo.diagonals[p]:
+            s = stones[d]
+            if s == o:
+                opponents += 1
+            elif s == BORDER_CODE:
+                edge = 1
+        return opponents + edge < 2
+
+    def legal_moves(self, color):
+        '''Iterator over legal moves for given color.'''
+        c = COLOR_CODES[color]
+        ko_point = self.ko_point if color == self.ko_color else 0
+        stones = self.stones
+        position = self.geo.position
+        for p in self.geo.points:
+            if stones[p] == EMPTY_CODE and p != ko_point and \
+               self.is_legal_point(c, p):
+                yield position[p]
+
+    def groups(self, color, liberties):
+        '''Return the groups of color with the given number of liberties.
+
+        Groups are given by their ids, as in Board.groups.
+        '''
+        return self.liberty_groups[COLOR_CODES[color]][liberties]
+
+    def group_liberties(self, g):
+        '''Return the liberties of a group from groups.'''
+        stones = self.stones
+        neighbors = self.geo.neighbors
+        position = self.geo.position
+        liberties = []
+        for s in self.group_stones(g):
+            for n in neighbors[s]:
+                if stones[n] == EMPTY_CODE and position[n] not in liberties:
+                    liberties.append(position[n])
+        return liberties
+
+    def random_legal_move(self, color, fill_eyes=True):
+        '''Return a uniformly random legal move for color, or PASS if none.
+
+        Empty points are drawn without replacement and only the drawn points
+        are checked, so a move usually costs a single legality test. With
+        fill_eyes=False, moves into the true eyes of color do not count.
+        '''
+        c = COLOR_CODES[color]
+        ko_point = self.ko_point if color == self.ko_color else 0
+        empties = self.empties
+        index = self.empty_index
+        n = len(empties)
+        while n > 0:
+            i = random.randrange(n)
+            p = empties[i]
+            if p != ko_point and self.is_legal_point(c, p) and \
+               (fill_eyes or not self.is_eye_point(c, p)):
+                return self.geo.position[p]
+            n -= 1
+            last = empties[n]
+            empties[i], empties[n] = last, p
+            index[last], index[p] = i, n
+        return PASS
+
+    def place(self, color, row, col):
+        '''Place a stone on the board if the given position is empty.'''
+        if (row, col) == PASS:
+            self.history.append((0, [], 0, [], [], 0, None, self.saved_state()))
+            self.ko_color = None
+            self.ko_point = 0
+            return
+
+        p = self.geo.point(row, col)
+        if self.stones[p] != EMPTY_CODE:
+            return
+        self._blocks = None
+        saved = self.saved_state()
+
+        c = COLOR_CODES[color]
+        o = 3 - c
+        stones = self.stones
+        group = self.group
+        libs = self.libs
+        neighbors = self.geo.neighbors[p]
+
+        cell = (self.next_stone[p], self.group_size[p], libs[p])
+        touched, joins, libs_before = self.add_stone(c, p)
+
+        captured = []
+        removed, removed_code = [], o
+        for n in neighbors:
+            if stones[n] == o and libs[group[n]] == 0:
+                removed.append(group[n])
+                captured.extend(self.remove_group(group[n]))
+
+        g = group[p]
+        if len(captured) == 1 and self.group_size[g] == 1 and libs[g] == 1:
+            self.ko_color = opponent(color)
+            self.ko_point = captured[0]
+        else:
+            self.ko_color = None
+            self.ko_point = 0
+
+        if len(captured) > 0:
+            self.captures[color] += len(captured)
+        elif libs[g] == 0:
+            self.captures[opponent(color)] += self.group_size[g]
+            removed, removed_code = [g], c
+            self.remove_group(g)
+
+        self.update_atari(p)
+        self.reindex(p, [s for g in removed for s in self.group_stones(g)],
+                     removed + [g2 for g1, g2 in joins])
+        self.history.append((p, removed, removed_code, touched, joins,
+                             libs_before, cell, saved))
+
+    def saved_state(self):
+        return (self.ko_point, self.ko_color, self.atari_group,
+                self.captures[BLACK], self.captures[WHITE], self.hash,
+                self.symmetry_hash)
+
+    def mark(self):
+        '''Return a marker for the current position to pass to rewind_to.'''
+        return len(self.history)
+
+    def undo(self):
+        '''Take back the last call to place.'''
+        p, removed, removed_code, touched, joins, libs_before, cell, saved = \
+            self.history.pop()
+        if p:
+            self._blocks = None
+            group = self.group
+            points = [s for g in removed for s in self.group_stones(g)]
+            for g in reversed(removed):
+                self.restore_group(g, removed_code)
+
+            self.stones[p] = EMPTY_CODE
+            self.add_empty(p)
+            if joins:
+                self.libs[group[p]] = libs_before
+                for g1, g2 in reversed(joins):
+                    self.split_groups(g1, g2)
+            group[p] = 0
+            self.next_stone[p], self.group_size[p], self.libs[p] = cell
+            for g in touched:
+                self.libs[g] += 1
+            self.reindex(p, points, removed + [p])
+
+        ko_point, ko_color, atari_group, black, white, hash, symmetry_hash = \
+            saved
+        self.ko_point = ko_point
+        self.ko_color = ko_color
+        self.atari_group = atari_group
+        self.captures = {BLACK: black, WHITE: white}
+        self.hash = hash
+        self.symmetry_hash = symmetry_hash
+
+    def rewind_to(self, mark):
+        '''Undo moves until the board is back at the given marker.'''
+        while len(self.history) > mark:
+            self.undo()
+
+    def update_atari(self, p):
+        stones = self.stones
+        group = self.group
+        count = 0
+        self.atari_group = 0
+        for n in self.geo.neighbors[p]:
+            if stones[n] == BLACK_CODE or stones[n] == WHITE_CODE:
+                g = group[n]
+                if self.libs[g] == 1 and self.group_size[g] > count:
+                    count = self.group_size[g]
+                    self.atari_group = g
+
+    def reindex(self, p, removed, changed):
+        '''Refresh the liberty index after a move at p or its undo.
+
+        As in Board.reindex, only groups next to p or to the removed points
+        are refiled, and ids in changed that are no longer groups are
+        dropped.
+        '''
+        stones = self.stones
+        group = self.group
+        neighbors = self.geo.neighbors
+        bucket = self.liberty_bucket
+        for g in changed:
+            if group[g] != g and bucket[g] is not None:
+                bucket[g].discard(g)
+                bucket[g] = None
+        points = [p]
+        points.extend(neighbors[p])
+        for s in removed:
+            points.extend(neighbors[s])
+        for n in points:
+            c = stones[n]
+            if c == BLACK_CODE or c == WHITE_CODE:
+                g = group[n]
+                target = self.liberty_groups[c][min(self.libs[g], 3)]
+                if bucket[g] is not target:
+                    if bucket[g] is not None:
+                        bucket[g].discard(g)
+                    target.add(g)
+                    bucket[g] = target
+
+    def add_stone(self, c, p):
+        '''Add a stone and return what undo needs to take it back.'''
+        stones = self.stones
+        group = self.group
+        libs = self.libs
+        o = 3 - c
+
+        stones[p] = c
+        self.hash ^= self.geo.zobrist[c][p]
+        self.symmetry_hash ^= self.geo.symmetry_keys[c][p]
+        self.remove_empty(p)
+        group[p] = p
+        self.next_stone[p] = p
+        self.group_size[p] = 1
+
+        count = 0
+        touched = []
+        for n in self.geo.neighbors[p]:
+            s = stones[n]
+            if s == EMPTY_CODE:
+                count += 1
+            elif s == o and group[n] not in touched:
+                touched.append(group[n])
+                libs[group[n]] -= 1
+        libs[p] = count
+
+        joins = []
+        for n in self.geo.neighbors[p]:
+            if stones[n] == c and group[n] != group[p]:
+                joins.append(self.join_groups(group[n], group[p]))
+        libs_before = 0
+        if joins:
+            g = group[p]
+            libs_before = libs[g]
+            libs[g] = self.count_libs(g)
+        return touched, joins, libs_before
+
+    def join_groups(self, g1, g2):
+        '''Merge two groups, relabelling the stones of the smaller one.'''
+        size = self.group_size
+        if size[g1] < size[g2]:
+            g1, g2 = g2, g1
+        group = self.group
+        for s in self.group_stones(g2):
+            group[s] = g1
+        nxt = self.next_stone
+        nxt[g1], nxt[g2] = nxt[g2], nxt[g1]
+        size[g1] += size[g2]
+        return g1, g2
+
+    def split_groups(self, g1, g2):
+        '''Undo join_groups(g1, g2).'''
+        nxt = self.next_stone
+        nxt[g1], nxt[g2] = nxt[g2], nxt[g1]
+        group = self.group
+        for s in self.group_stones(g2):
+            group[s] = g2
+        self.group_size[g1] -= self.group_size[g2]
+
+    def restore_group(self, g, c):
+        '''Put a group removed by remove_group back on the board.'''
+        stones = self.stones
+        group = self.group
+        libs = self.libs
+        neighbors = self.geo.neighbors
+        o = 3 - c
+        points = self.group_stones(g)
+        for s in points:
+            stones[s] = c
+            group[s] = g
+            self.remove_empty(s)
+        for s in points:
+            touched = []
+            for n in neighbors[s]:
+                if stones[n] == o and group[n] not in touched:
+                    touched.append(group[n])
+                    libs[group[n]] -= 1
+
+    def add_empty(self, p):
+        self.empty_index[p] = len(self.empties)
+        self.empties.append(p)
+
+    def remove_empty(self, p):
+        i = self.empty_index[p]
+        last = self.empties.pop()
+        if last != p:
+            self.empties[i] = last
+            self.empty_index[last] = i
+
+    def count_libs(self, g):
+        '''Count the distinct liberties of a group.'''
+        stones = self.stones
+        marks = self.marks
+        neighbors = self.geo.neighbors
+        self.mark_id += 1
+        mark = self.mark_id
+        count = 0
+        for s in self.group_stones(g):
+            for n in neighbors[s]:
+                if stones[n] == EMPTY_CODE and marks[n] != mark:
+                    marks[n] = mark
+                    count += 1
+        return count
+
+    def group_stones(self, g):
+        '''List the points of a group.'''
+        nxt = self.next_stone
+        points = [g]
+        s = nxt[g]
+        while s != g:
+            points.append(s)
+            s = nxt[s]
+        return points
+
+    def remove_group(self, g):
+        '''Remove a group from the board and return its points.'''
+        stones = self.stones
+        group = self.group
+        libs = self.libs
+        neighbors = self.geo.neighbors
+        zobrist = self.geo.zobrist
+        symmetry_keys = self.geo.symmetry_keys
+        points = self.group_stones(g)
+        for s in points:
+            self.hash ^= zobrist[stones[s]][s]
+            self.symmetry_hash ^= symmetry_keys[stones[s]][s]
+            stones[s] = EMPTY_CODE
+            group[s] = 0
+            self.add_empty(s)
+        for s in points:
+            touched = []
+            for n in neighbors[s]:
+                if stones[n] == BLACK_CODE or stones[n] == WHITE_CODE:
+                    if group[n] not in touched:
+                        touched.append(group[n])
+                        libs[group[n]] += 1
+        return points
@@ -0,0 +1,575 @@
+import random
+
+from .const import *
+from .board import Block, opponent
+from .zobrist import zobrist_table
+from .symmetry import symmetries
+
+try:
+    popcount = int.bit_count
+except AttributeError:
+    def popcount(x):
+        return bin(x).count('1')
+
+class BitGeometry:
+    '''Bit layout shared by every bitboard of one size.
+
+    Point (row, col) is bit row*stride + col, with stride = cols+1. The
+    extra column is never on the board, so a one-bit shift from the last
+    column lands on it and is masked off, and neighbor masks need no other
+    edge handling.
+    '''
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.stride = stride = cols + 1
+        self.points = [row*stride + col
+                       for row in range(rows) for col in range(cols)]
+        self.on_board = 0
+        for i in self.points:
+            self.on_board |= 1 << i
+
+        length = rows * stride
+        self.position = [None] * length
+        self.neighbors = [0] * length
+        self.neighbor_points = [()] * length
+        self.diagonals = [0] * length
+        self.zobrist = {BLACK: [0] * length, WHITE: [0] * length}
+        self.symmetry = symmetries(rows, cols)
+        self.symmetry_keys = {BLACK: [0] * length, WHITE: [0] * length}
+        table = zobrist_table(rows, cols)
+        for k, i in enumerate(self.points):
+            row, col = divmod(i, stride)
+            self.position[i] = (row, col)
+            self.zobrist[BLACK][i] = table[BLACK][k]
+            self.zobrist[WHITE][i] = table[WHITE][k]
+            self.symmetry_keys[BLACK][i] = self.symmetry.keys[BLACK][k]
+            self.symmetry_keys[WHITE][i] = self.symmetry.keys[WHITE][k]
+            points = []
+            if row > 0:
+                points.append(i - stride)
+            if col > 0:
+                points.append(i - 1)
+            if row < rows-1:
+                points.append(i + stride)
+            if col < cols-1:
+                points.append(i + 1)
+            self.neighbor_points[i] = tuple(points)
+            for n in points:
+                self.neighbors[i] |= 1 << n
+            for dr, dc in ((-1, -1), (-1, 1), (1, -1), (1, 1)):
+                if 0 <= row+dr < rows and 0 <= col+dc < cols:
+                    self.diagonals[i] |= 1 << (i + dr*stride + dc)
+
+    def point(self, row, col):
+        return row*self.stride + col
+
+    def expand(self, x):
+        '''Return the on-board points next to the points of x.'''
+        s = self.stride
+        return ((x << 1) | (x >> 1) | (x << s) | (x >> s)) & self.on_board
+
+_GEOMETRIES = {}
+
+def bit_geometry(rows, cols):
+    '''Return the bit layout for the given board size.'''
+    key = (rows, cols)
+    if key not in _GEOMETRIES:
+        _GEOMETRIES[key] = BitGeometry(rows, cols)
+    return _GEOMETRIES[key]
+
+def bits(x):
+    '''Iterate over the indices of the set bits of x, lowest first.'''
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+class BitBoard:
+    '''Board with the same interface as util.board.Board, kept in bitboards.
+
+    Black and white stones are two Python ints with one bit per point.
+    Groups are found by flood fill with shifts and masks, and liberties are
+    the empty points in the expanded group. Apart from the index of groups
+    by liberty count, nothing is kept per group, so undo restores a
+    snapshot of a few ints and reverts the logged index changes.
+    '''
+    def __init__(self, rows, cols, komi=0.0, suicide_allowed=False):
+        self.rows = rows
+        self.cols = cols
+        self.geo = bit_geometry(rows, cols)
+        self.set_komi(komi)
+        self.suicide_allowed = suicide_allowed
+        self.reset()
+
+    def __str__(self):
+        return '{0}\nBlack: {1}\nWhite: {2}\n'.format(
+                    '\n'.join(map(lambda x:''.join(x), reversed(self.config))),
+                    self.captures[BLACK], self.captures[WHITE])
+
+    def __getitem__(self, position):
+        row, col = position
+        bit = 1 << self.geo.point(row, col)
+        if self.stones[BLACK] & bit:
+            return BLACK
+        if self.stones[WHITE] & bit:
+            return WHITE
+        return EMPTY
+
+    def reset(self):
+        '''Reset the board.'''
+        self.stones = {BLACK: 0, WHITE: 0}
+        self.captures = {BLACK: 0, WHITE: 0}
+        self.ko_point = None
+        self.ko_color = None
+        self.atari_group = 0
+        self.hash = 0
+        self.symmetry_hash = 0
+        self.history = []
+        self._blocks = None
+        self.liberty_groups = {BLACK: [set(), set(), set(), set()],
+                               WHITE: [set(), set(), set(), set()]}
+        self.liberty_bucket = {}
+
+    def clone(self):
+        '''Return an independent copy of the board, without its undo history.'''
+        board = self.__class__.__new__(self.__class__)
+        board.rows = self.rows
+        board.cols = self.cols
+        board.geo = self.geo
+        board.komi = self.komi
+        board.suicide_allowed = self.suicide_allowed
+        board.stones = dict(self.stones)
+        board.captures = dict(self.captures)
+        board.ko_point = self.ko_point
+        board.ko_color = self.ko_color
+        board.atari_group = self.atari_group
+        board.hash = self.hash
+        board.symmetry_hash = self.symmetry_hash
+        board.history = []
+        board._blocks = None
+        board.liberty_groups = {}
+        board.liberty_bucket = {}
+        for color in (BLACK, WHITE):
+            copies = [set(bucket) for bucket in self.liberty_groups[color]]
+            board.liberty_groups[color] = copies
+            for bucket in copies:
+                for group in bucket:
+                    board.liberty_bucket[group] = bucket
+        return board
+
+    def __copy__(self):
+        return self.clone()
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    @property
+    def config(self):
+        black = self.stones[BLACK]
+        white = self.stones[WHITE]
+        stride = self.geo.stride
+        config = []
+        for row in range(self.rows):
+            line = []
+            for i in range(row*stride, row*stride + self.cols):
+                if black >> i & 1:
+                    line.append(BLACK)
+                elif white >> i & 1:
+                    line.append(WHITE)
+                else:
+                    line.append(EMPTY)
+            config.append(line)
+        return config
+
+    @property
+    def empty(self):
+        '''Bitboard of the empty points.'''
+        return self.geo.on_board & ~(self.stones[BLACK] | self.stones[WHITE])
+
+    @property
+    def empties(self):
+        return list(self.empty_positions())
+
+    @property
+    def symmetry(self):
+        return self.geo.symmetry
+
+    @property
+    def ko_move(self):
+        return self.geo.position[self.ko_point] if self.ko_point is not None \
+               else None
+
+    @property
+    def blocks(self):
+        '''Mapping from stone position to Block, built on demand.'''
+        if self._blocks is None:
+            blocks = {}
+            for color in (BLACK, WHITE):
+                stones = self.stones[color]
+                while stones:
+                    group = self.flood(stones & -stones, stones)
+                    stones &= ~group
+                    block = self.make_block(group)
+                    for pos in block.members:
+                        blocks[pos] = block
+            self._blocks = blocks
+        return self._blocks
+
+    @property
+    def atari_block(self):
+        if self.atari_group == 0:
+            return None
+        if self._blocks is None:
+            return self.make_block(self.atari_group)
+        return self.blocks[self.geo.position[self.atari_group.bit_length()-1]]
+
+    def make_block(self, group):
+        position = self.geo.position
+        block = Block()
+        block.members.update(position[i] for i in bits(group))
+        block.free_neighbors.update(position[i]
+                                    for i in bits(self.liberties(group)))
+        return block
+
+    def set_komi(self, komi):
+        '''Set the komi.'''
+        self.komi = komi
+
+    def allow_suicide(self, allowed):
+        '''Change setting for whether multi-stone suicide is allowed.'''
+        self.suicide_allowed = allowed
+
+    def set_config(self, config):
+        self.reset()
+        for i in range(self.rows):
+            for j in range(self.cols):
+                if config[i][j] != EMPTY:
+                    self.place(config[i][j], i, j)
+
+    def size(self):
+        '''Number of intersections on the board.'''
+        return self.rows * self.cols
+
+    def get_state(self):
+        '''Return a hashable representation of board configuration.'''
+        return ''.join(map(lambda x:''.join(x), self.config))
+
+    def get_hash(self):
+        '''Return the Zobrist hash of the board configuration.'''
+        return self.hash
+
+    def canonical_hash(self):
+        '''Return the smallest hash over the rotations and reflections, as
+        Board.canonical_hash.'''
+        return self.geo.symmetry.canonical(self.symmetry_hash)
+
+    def fixing_symmetries(self):
+        '''Symmetries, other than the identity, that leave the position unchanged.'''
+        return self.geo.symmetry.fixing(self.symmetry_hash)
+
+    def score(self, color):
+        '''Return score for given color.'''
+        black_score = self.captures[BLACK] - self.captures[WHITE] - self.komi
+        if color == BLACK:
+            return black_score
+        else:
+            return -black_score
+
+    def area_score(self, color):
+        '''Return the area score for given color, as Board.area_score.
+
+        Each empty region is one flood fill, and its owner is found by
+        testing its border against the stones of each color.
+        '''
+        black = self.stones[BLACK]
+        white = self.stones[WHITE]
+        expand = self.geo.expand
+        area = popcount(black) - popcount(white)
+        empty = self.empty
+        while empty:
+            region = self.flood(empty & -empty, empty)
+            empty &= ~region
+            border = expand(region)
+            if border & black:
+                if not border & white:
+                    area += popcount(region)
+            elif border & white:
+                area -= popcount(region)
+
+        black_score = area - self.komi
+        if color == BLACK:
+            return black_score
+        else:
+            return -black_score
+
+    def empty_positions(self):
+        '''Iterator over empty positions.'''
+        position = self.geo.position
+        for i in bits(self.empty):
+            yield position[i]
+
+    def flood(self, seed, stones):
+        '''Return the group of stones connected to the bits of seed.'''
+        s = self.geo.stride
+        group = frontier = seed
+        rest = stones & ~seed
+        while frontier:
+            frontier = ((frontier << 1) | (frontier >> 1) |
+                        (frontier << s) | (frontier >> s)) & rest
+            group |= frontier
+            rest ^= frontier
+        return group
+
+    def liberties(self, group):
+        '''Return the bitboard of the liberties of a group.'''
+        return self.geo.expand(group) & self.empty
+
+    def is_legal(self, color, row, col):
+        '''Check if a move is legal, with the same rules as Board.is_legal.'''
+        i = self.geo.point(row, col)
+        if i == self.ko_point and color == self.ko_color:
+            return False
+        return self.is_legal_point(color, i, self.empty)
+
+    def is_legal_point(self, color, i, empty):
+        neighbors = self.geo.neighbors[i]
+        if neighbors & empty:
+            return True
+        expand = self.geo.expand
+        opp = self.stones[opponent(color)]
+        x = neighbors & opp
+        while x:
+            group = self.flood(x & -x, opp)
+            if popcount(expand(group) & empty) == 1:
+                return True
+            x &= ~group
+        own = self.stones[color]
+        x = neighbors & own
+        while x:
+            group = self.flood(x & -x, own)
+            if self.suicide_allowed or popcount(expand(group) & empty) != 1:
+                return True
+            x &= ~group
+        return False
+
+    def is_eye(self, color, row, col):
+        '''Check if an empty point is a single-point true eye of color.'''
+        i = self.geo.point(row, col)
+        return bool(self.empty >> i & 1) and self.is_eye_point(color, i)
+
+    def is_eye_point(self, color, i):
+        if self.geo.neighbors[i] & ~self.stones[color]:
+            return False
+        diagonals = self.geo.diagonals[i]
+        opponents = popcount(diagonals & self.stones[opponent(color)])
+        return opponents == 0 or (opponents == 1 and popcount(diagonals) == 4)
+
+    def legal_moves(self, color):
+        '''Iterator over legal moves for given color.'''
+        ko_point = self.ko_point if color == self.ko_color else None
+        empty = self.empty
+        position = self.geo.position
+        for i in bits(empty):
+            if i != ko_point and self.is_legal_point(color, i, empty):
+                yield position[i]
+
+    def groups(self, color, liberties):
+        '''Return the groups of color with the given number of liberties.
+
+        Groups are given as bitboards, as in Board.groups.
+        '''
+        return self.liberty_groups[color][liberties]
+
+    def group_liberties(self, group):
+        '''Return the liberties of a group from groups.'''
+        position = self.geo.position
+        return [position[i] for i in bits(self.liberties(group))]
+
+    def random_legal_move(self, color, fill_eyes=True):
+        '''Return a uniformly random legal move for color, or PASS if none.
+
+        Points are drawn at random until one is empty and legal. After a
+        bounded number of misses, the empty points are shuffled and tried
+        in turn instead, which also finds out when there is no legal move.
+        With fill_eyes=False, moves into the true eyes of color do not count.
+        '''
+        ko_point = self.ko_point if color == self.ko_color else None
+        empty = self.empty
+        points = self.geo.points
+        n = len(points)
+        for k in range(n):
+            i = points[int(random.random() * n)]
+            if empty >> i & 1 and i != ko_point and \
+               self.is_legal_point(color, i, empty) and \
+               (fill_eyes or not self.is_eye_point(color, i)):
+                return self.geo.position[i]
+
+        candidates = list(bits(empty))
+        random.shuffle(candidates)
+        for i in candidates:
+            if i != ko_point and self.is_legal_point(color, i, empty) and \
+               (fill_eyes or not self.is_eye_point(color, i)):
+                return self.geo.position[i]
+        return PASS
+
+    def place(self, color, row, col):
+        '''Place a stone on the board if the given position is empty.'''
+        if (row, col) == PASS:
+            self.history.append(self.saved_state() + ((),))
+            self.ko_color = None
+            self.ko_point = None
+            return
+
+        i = self.geo.point(row, col)
+        bit = 1 << i
+        if (self.stones[BLACK] | self.stones[WHITE]) & bit:
+            return
+        changes = []
+        self.history.append(self.saved_state() + (changes,))
+        self._blocks = None
+
+        oppcolor = opponent(color)
+        expand = self.geo.expand
+        own = self.stones[color] | bit
+        opp = self.stones[oppcolor]
+        self.hash ^= self.geo.zobrist[color][i]
+        self.symmetry_hash ^= self.geo.symmetry_keys[color][i]
+        empty = self.geo.on_board & ~(own | opp)
+
+        captured = 0
+        groups = []
+        x = self.geo.neighbors[i] & opp
+        while x:
+            group = self.flood(x & -x, opp)
+            if expand(group) & empty:
+                groups.append(group)
+            else:
+                captured |= group
+                self.unfile(group, changes)
+            x &= ~group
+        if captured:
+            opp &= ~captured
+            empty |= captured
+            self.remove_stones(oppcolor, captured)
+
+        group = self.flood(bit, own)
+        libs = expand(group) & empty
+        num_captured = popcount(captured)
+        if num_captured == 1 and group == bit and popcount(libs) == 1:
+            self.ko_color = oppcolor
+            self.ko_point = captured.bit_length() - 1
+        else:
+            self.ko_color = None
+            self.ko_point = None
+
+        if num_captured > 0:
+            self.captures[color] += num_captured
+        elif not libs:
+            self.captures[oppcolor] += popcount(group)
+            own &= ~group
+            empty |= group
+            self.remove_stones(color, group)
+        if own & bit:
+            groups.append(group)
+
+        old = self.stones[color]
+        x = self.geo.neighbors[i] & old
+        while x:
+            merged = self.flood(x & -x, old)
+            self.unfile(merged, changes)
+            x &= ~merged
+        for g in groups:
+            self.refile(oppcolor if g & opp else color, g, empty, changes)
+        # Groups next to the removed stones have gained liberties.
+        if captured:
+            x, stones, owner = expand(captured) & own, own, color
+        elif not own & bit:
+            x, stones, owner = expand(group) & opp, opp, oppcolor
+        else:
+            x = 0
+        while x:
+            g = self.flood(x & -x, stones)
+            self.refile(owner, g, empty, changes)
+            x &= ~g
+
+        self.stones[color] = own
+        self.stones[oppcolor] = opp
+        self.update_atari(i, groups, empty)
+
+    def remove_stones(self, color, group):
+        zobrist = self.geo.zobrist[color]
+        symmetry_keys = self.geo.symmetry_keys[color]
+        for i in bits(group):
+            self.hash ^= zobrist[i]
+            self.symmetry_hash ^= symmetry_keys[i]
+
+    def update_atari(self, i, groups, empty):
+        '''Remember the largest of the groups next to point i in atari.'''
+        expand = self.geo.expand
+        count = 0
+        self.atari_group = 0
+        for n in self.geo.neighbor_points[i]:
+            bit = 1 << n
+            for group in groups:
+                if group & bit:
+                    size = popcount(group)
+                    if size > count and popcount(expand(group) & empty) == 1:
+                        count = size
+                        self.atari_group = group
+                    break
+
+    def refile(self, color, group, empty, changes):
+        '''File a group under its liberty count and log the change for undo.'''
+        n = popcount(self.geo.expand(group) & empty)
+        bucket = self.liberty_groups[color][n if n < 3 else 3]
+        old = self.liberty_bucket.get(group)
+        if old is not bucket:
+            if old is not None:
+                old.discard(group)
+            bucket.add(group)
+            self.liberty_bucket[group] = bucket
+            changes.append((group, old, bucket))
+
+    def unfile(self, group, changes):
+        '''Drop a merged or captured group from the liberty index.'''
+        old = self.liberty_bucket.pop(group, None)
+        if old is not None:
+            old.discard(group)
+            changes.append((group, old, None))
+
+    def saved_state(self):
+        return (self.stones[BLACK], self.stones[WHITE], self.ko_point,
+                self.ko_color, self.atari_group, self.captures[BLACK],
+                self.captures[WHITE], self.hash, self.symmetry_hash)
+
+    def mark(self):
+        '''Return a marker for the current position to pass to rewind_to.'''
+        return len(self.history)
+
+    def undo(self):
+        '''Take back the last call to place.'''
+        black, white, ko_point, ko_color, atari_group, black_caps, white_caps, \
+            hash, symmetry_hash, changes = self.history.pop()
+        bucket = self.liberty_bucket
+        for group, old, new in reversed(changes):
+            if new is not None:
+                new.discard(group)
+            if old is not None:
+                old.add(group)
+                bucket[group] = old
+            else:
+                del bucket[group]
+        self.stones = {BLACK: black, WHITE: white}
+        self.ko_point = ko_point
+        self.ko_color = ko_color
+        self.atari_group = atari_group
+        self.captures = {BLACK: black_caps, WHITE: white_caps}
+        self.hash = hash
+        self.symmetry_hash = symmetry_hash
+        self._blocks = None
+
+    def rewind_to(self, mark):
+        '''Undo moves until the board is back at the given marker.'''
+        while len(self.history) > mark:
+            self.undo()
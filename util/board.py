@@ -1,4 +1,8 @@
+import random
+
 from .const import *
+from .zobrist import zobrist_table
+from .symmetry import symmetries
 
 def opponent(color):
     if color == BLACK:
@@ -31,6 +35,8 @@ class Board:
         self.cols = cols
         self.set_komi(komi)
         self.suicide_allowed = suicide_allowed
+        self.zobrist = zobrist_table(rows, cols)
+        self.symmetry = symmetries(rows, cols)
         self.reset()
 
     def __str__(self):
@@ -51,8 +57,58 @@ class Board:
         self.ko_move = None
         self.ko_color = None
         self.atari_block = None
+        self.hash = 0
+        self.symmetry_hash = 0
+        self.history = []
+        self.empties = [(row, col) for row in range(self.rows)
+                                   for col in range(self.cols)]
+        self.empty_index = dict((pos, i) for i, pos in enumerate(self.empties))
 
         self.blocks = {}
+        self.liberty_groups = {BLACK: [set(), set(), set(), set()],
+                               WHITE: [set(), set(), set(), set()]}
+        self.liberty_bucket = {}
+
+    def clone(self):
+        '''Return an independent copy of the board, without its undo history.'''
+        board = self.__class__.__new__(self.__class__)
+        board.rows = self.rows
+        board.cols = self.cols
+        board.komi = self.komi
+        board.suicide_allowed = self.suicide_allowed
+        board.zobrist = self.zobrist
+        board.symmetry = self.symmetry
+        board.config = [row[:] for row in self.config]
+        board.captures = dict(self.captures)
+        board.ko_move = self.ko_move
+        board.ko_color = self.ko_color
+        board.hash = self.hash
+        board.symmetry_hash = self.symmetry_hash
+        board.history = []
+        board.empties = self.empties[:]
+        board.empty_index = dict(self.empty_index)
+
+        copies = {}
+        board.blocks = {}
+        for pos, block in self.blocks.items():
+            if block not in copies:
+                copies[block] = Block()
+                copies[block].members = set(block.members)
+                copies[block].free_neighbors = set(block.free_neighbors)
+            board.blocks[pos] = copies[block]
+        board.atari_block = copies.get(self.atari_block)
+        board.liberty_groups = {BLACK: [set(), set(), set(), set()],
+                                WHITE: [set(), set(), set(), set()]}
+        board.liberty_bucket = {}
+        for pos, block in board.blocks.items():
+            board.index_block(block, board[pos])
+        return board
+
+    def __copy__(self):
+        return self.clone()
+
+    def __deepcopy__(self, memo):
+        return self.clone()
 
     def set_komi(self, komi):
         '''Set the komi.'''
@@ -77,6 +133,23 @@ class Board:
         '''Return a hashable representation of board configuration.'''
         return ''.join(map(lambda x:''.join(x), self.config))
 
+    def get_hash(self):
+        '''Return the Zobrist hash of the board configuration.'''
+        return self.hash
+
+    def canonical_hash(self):
+        '''Return the smallest hash over the rotations and reflections.
+
+        The result is (hash, t), where symmetry t maps this position to the
+        canonical one. Moves found for the canonical position map back to
+        this board with self.symmetry.untransform(move, t).
+        '''
+        return self.symmetry.canonical(self.symmetry_hash)
+
+    def fixing_symmetries(self):
+        '''Symmetries, other than the identity, that leave the position unchanged.'''
+        return self.symmetry.fixing(self.symmetry_hash)
+
     def score(self, color):
         '''Return score for given color.'''
         black_score = self.captures[BLACK] - self.captures[WHITE] - self.komi
@@ -85,6 +158,44 @@ class Board:
         else:
             return -black_score
 
+    def area_score(self, color):
+        '''Return the area score for given color.
+
+        Each side counts its stones plus the empty regions that touch only
+        its stones. Komi goes to white.
+        '''
+        area = {BLACK: 0, WHITE: 0, EMPTY: 0}
+        for line in self.config:
+            for stone in line:
+                area[stone] += 1
+
+        seen = set()
+        for pos in self.empties:
+            if pos in seen:
+                continue
+            seen.add(pos)
+            region = [pos]
+            borders = set()
+            k = 0
+            while k < len(region):
+                row, col = region[k]
+                k += 1
+                for npos in self.neighbors(row, col):
+                    stone = self[npos]
+                    if stone != EMPTY:
+                        borders.add(stone)
+                    elif npos not in seen:
+                        seen.add(npos)
+                        region.append(npos)
+            if len(borders) == 1:
+                area[borders.pop()] += len(region)
+
+        black_score = area[BLACK] - area[WHITE] - self.komi
+        if color == BLACK:
+            return black_score
+        else:
+            return -black_score
+
     def empty_positions(self):
         '''Iterator over empty positions.'''
         for row in range(self.rows):
@@ -119,23 +230,83 @@ class Board:
         return filter(lambda p:self.is_legal(color, p[0], p[1]),
                       self.empty_positions())
 
+    def is_eye(self, color, row, col):
+        '''Check if an empty point is a single-point true eye of color.
+
+        All neighbors must be stones of color, and the opponent may hold
+        at most one diagonal point, or none on the edge.
+        '''
+        if self.config[row][col] != EMPTY:
+            return False
+        for npos in self.neighbors(row, col):
+            if self[npos] != color:
+                return False
+        oppcolor = opponent(color)
+        diagonals = 0
+        opponents = 0
+        for dpos in self.diagonals(row, col):
+            diagonals += 1
+            if self[dpos] == oppcolor:
+                opponents += 1
+        return opponents == 0 or (opponents == 1 and diagonals == 4)
+
+    def groups(self, color, liberties):
+        '''Return the groups of color with the given number of liberties.
+
+        liberties is 1, 2 or 3, where 3 stands for three or more. The groups
+        are indexed by liberty count as moves are placed and undone, so this
+        does no scanning. Pass the groups to group_liberties.
+        '''
+        return self.liberty_groups[color][liberties]
+
+    def group_liberties(self, group):
+        '''Return the liberties of a group from groups.'''
+        return list(group.free_neighbors)
+
+    def random_legal_move(self, color, fill_eyes=True):
+        '''Return a uniformly random legal move for color, or PASS if none.
+
+        Empty points are drawn without replacement and only the drawn points
+        are checked, so a move usually costs a single legality test. With
+        fill_eyes=False, moves into the true eyes of color do not count.
+        '''
+        empties = self.empties
+        index = self.empty_index
+        n = len(empties)
+        while n > 0:
+            i = random.randrange(n)
+            pos = empties[i]
+            if self.is_legal(color, pos[0], pos[1]) and \
+               (fill_eyes or not self.is_eye(color, pos[0], pos[1])):
+                return pos
+            n -= 1
+            last = empties[n]
+            empties[i], empties[n] = last, pos
+            index[last], index[pos] = i, n
+        return PASS
+
     def place(self, color, row, col):
         '''Place a stone on the board if the given position is empty.'''
-        if self.config[row][col] != EMPTY:
-            return
         if (row, col) == PASS:
+            self.history.append((PASS, color, [], [], self.saved_state()))
             self.ko_color = None
             self.ko_move = None
             return
+        if self.config[row][col] != EMPTY:
+            return
 
         pos = (row, col)
         oppcolor = opponent(color)
+        saved = self.saved_state()
+        joined = self.snapshot_blocks(color, pos)
 
         self.add_stone(color, row, col)
 
         captured = []
+        removed = []
         for npos in self.neighbors(row, col):
             if self[npos] == oppcolor and self.blocks[npos].is_captured():
+                removed.append(self.blocks[npos])
                 captured.extend(self.blocks[npos].members)
                 self.remove_block(npos)
 
@@ -144,10 +315,84 @@ class Board:
         if len(captured) > 0:
             self.captures[color] += len(captured)
         elif self.blocks[pos].is_captured():
+            removed.append(self.blocks[pos])
             self.captures[oppcolor] += len(self.blocks[pos].members)
             self.remove_block(pos)
 
         self.update_atari(oppcolor, pos)
+        self.reindex(pos, [p for b in removed for p in b.members],
+                     removed + [b for b, m, f in joined])
+        self.history.append((pos, color, removed, joined, saved))
+
+    def saved_state(self):
+        return (self.ko_move, self.ko_color, self.atari_block,
+                self.captures[BLACK], self.captures[WHITE], self.hash,
+                self.symmetry_hash)
+
+    def snapshot_blocks(self, color, pos):
+        '''Copy the blocks of the given color next to pos before a merge.'''
+        snapshots = []
+        for npos in self.neighbors(pos[0], pos[1]):
+            if self[npos] == color:
+                block = self.blocks[npos]
+                if all(block is not b for b, m, f in snapshots):
+                    snapshots.append((block, set(block.members),
+                                      set(block.free_neighbors)))
+        return snapshots
+
+    def mark(self):
+        '''Return a marker for the current position to pass to rewind_to.'''
+        return len(self.history)
+
+    def undo(self):
+        '''Take back the last call to place.'''
+        pos, color, removed, joined, saved = self.history.pop()
+        if pos != PASS:
+            stones = [p for b in removed for p in b.members]
+            changed = removed + [b for b, m, f in joined]
+            changed.append(self.blocks.get(pos))
+            for block in removed:
+                self.restore_block(block, opponent(color)
+                                   if pos not in block.members else color)
+
+            self.config[pos[0]][pos[1]] = EMPTY
+            self.add_empty(pos)
+            self.blocks.pop(pos)
+            for block, members, free_neighbors in joined:
+                block.members = members
+                block.free_neighbors = free_neighbors
+                for p in members:
+                    self.blocks[p] = block
+            for npos in self.neighbors(pos[0], pos[1]):
+                if npos in self.blocks and self[npos] != color:
+                    self.blocks[npos].free_neighbors.add(pos)
+            self.reindex(pos, stones, changed)
+
+        ko_move, ko_color, atari_block, black, white, hash, symmetry_hash = \
+            saved
+        self.ko_move = ko_move
+        self.ko_color = ko_color
+        self.atari_block = atari_block
+        self.captures = {BLACK: black, WHITE: white}
+        self.hash = hash
+        self.symmetry_hash = symmetry_hash
+
+    def rewind_to(self, mark):
+        '''Undo moves until the board is back at the given marker.'''
+        while len(self.history) > mark:
+            self.undo()
+
+    def restore_block(self, block, color):
+        '''Put a removed block back on the board.'''
+        block.free_neighbors.clear()
+        for row, col in block.members:
+            self.config[row][col] = color
+            self.remove_empty((row, col))
+            self.blocks[(row, col)] = block
+        for row, col in block.members:
+            for npos in self.neighbors(row, col):
+                if npos in self.blocks and self.blocks[npos] is not block:
+                    self.blocks[npos].free_neighbors.discard((row, col))
 
     def update_ko(self, oppcolor, pos, captured):
         if len(self.blocks[pos].members) == 1 and \
@@ -170,6 +415,41 @@ class Board:
         if count == 0:
             self.atari_block = None
 
+    def reindex(self, pos, removed, changed):
+        '''Refresh the liberty index after a move at pos or its undo.
+
+        Only the groups next to pos or to the removed stones can have
+        gained or lost liberties. Blocks in changed that no longer own
+        their stones were merged or captured and leave the index.
+        '''
+        points = [pos]
+        points.extend(self.neighbors(pos[0], pos[1]))
+        for row, col in removed:
+            points.extend(self.neighbors(row, col))
+        for block in changed:
+            if block is not None and \
+               self.blocks.get(next(iter(block.members))) is not block:
+                bucket = self.liberty_bucket.pop(block, None)
+                if bucket is not None:
+                    bucket.discard(block)
+        blocks = self.blocks
+        config = self.config
+        for row, col in points:
+            block = blocks.get((row, col))
+            if block is not None:
+                self.index_block(block, config[row][col])
+
+    def index_block(self, block, color):
+        '''File a block under its current number of liberties.'''
+        n = len(block.free_neighbors)
+        bucket = self.liberty_groups[color][n if n < 3 else 3]
+        old = self.liberty_bucket.get(block)
+        if old is not bucket:
+            if old is not None:
+                old.discard(block)
+            bucket.add(block)
+            self.liberty_bucket[block] = bucket
+
     def out_of_bounds(self, row, col):
         return row < 0 or row >= self.rows or col < 0 or col >= self.cols
 
@@ -183,14 +463,35 @@ class Board:
         if col < self.cols-1:
             yield (row, col+1)
 
+    def diagonals(self, row, col):
+        for i, j in ((row-1, col-1), (row-1, col+1),
+                     (row+1, col-1), (row+1, col+1)):
+            if not self.out_of_bounds(i, j):
+                yield (i, j)
+
     def free_neighbors(self, row, col):
         for i, j in self.neighbors(row, col):
             if self.config[i][j] == EMPTY:
                 yield (i, j)
 
+    def add_empty(self, pos):
+        self.empty_index[pos] = len(self.empties)
+        self.empties.append(pos)
+
+    def remove_empty(self, pos):
+        i = self.empty_index.pop(pos)
+        last = self.empties.pop()
+        if last != pos:
+            self.empties[i] = last
+            self.empty_index[last] = i
+
     def remove_stone(self, row, col):
         pos = (row, col)
+        color = self.config[row][col]
+        self.hash ^= self.zobrist[color][row*self.cols+col]
+        self.symmetry_hash ^= self.symmetry.keys[color][row*self.cols+col]
         self.config[row][col] = EMPTY
+        self.add_empty(pos)
         self.blocks.pop(pos)
         for npos in self.neighbors(row, col):
             if npos in self.blocks:
@@ -203,7 +504,10 @@ class Board:
 
     def add_stone(self, color, row, col):
         self.config[row][col] = color
+        self.hash ^= self.zobrist[color][row*self.cols+col]
+        self.symmetry_hash ^= self.symmetry.keys[color][row*self.cols+col]
         pos = (row, col)
+        self.remove_empty(pos)
         oppcolor = opponent(color)
         for npos in self.neighbors(row, col):
             if self[npos] == color:
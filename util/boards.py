@@ -0,0 +1,6 @@
+from .board import Board
+from .array_board import ArrayBoard
+from .bit_board import BitBoard
+
+# Board engines by their command line name.
+BOARDS = {'set': Board, 'array': ArrayBoard, 'bit': BitBoard}
@@ -0,0 +1,130 @@
+import struct
+
+from .const import *
+
+MAGIC = b'UIKG'
+VERSION = 1
+# magic, version, rows, cols, suicide allowed, num_caps, komi, winner,
+# reason, black score, number of moves
+HEADER = struct.Struct('<4sBBBBHfBBfI')
+MOVE = struct.Struct('<H')
+WHITE_BIT = 0x8000
+PASS_CODE = 0x7fff
+
+WINNER_CODES = {None: 0, BLACK: 1, WHITE: 2}
+WINNERS = {code: color for color, code in WINNER_CODES.items()}
+REASONS = ['score', 'resign', 'captures', 'limit', 'illegal']
+
+def sgf_point(move, rows):
+    '''SGF coordinates of a move, with row 0 at the bottom as in GTP.'''
+    if move == PASS:
+        return ''
+    row, col = move
+    return chr(ord('a') + col) + chr(ord('a') + rows-1-row)
+
+class GameRecord:
+    '''A finished game: the rules, the moves and the result.
+
+    moves is a list of (color, move) pairs, with PASS for passes. winner is
+    BLACK, WHITE or None for a draw, and reason is one of REASONS. score is
+    the final area or capture score for black, komi included.
+
+    Records are stored as a fixed header followed by 2 bytes per move: the
+    point row*cols+col, or PASS_CODE, with WHITE_BIT set for white moves.
+    Files of records are append-only, one record after another.
+    '''
+    def __init__(self, rows, cols, komi=6.5, suicide_allowed=False,
+                 num_caps=0):
+        self.rows = rows
+        self.cols = cols
+        self.komi = komi
+        self.suicide_allowed = suicide_allowed
+        self.num_caps = num_caps
+        self.moves = []
+        self.winner = None
+        self.reason = 'score'
+        self.score = 0.0
+
+    def add_move(self, color, move):
+        self.moves.append((color, move))
+
+    def set_result(self, winner, reason, score=0.0):
+        self.winner = winner
+        self.reason = reason
+        self.score = score
+
+    def result(self):
+        '''The result in SGF form, such as B+3.5, W+R or 0.
+
+        SGF has no result for a capture win, so it is given as the margin
+        in captures, without komi.
+        '''
+        if self.winner is None:
+            return '0'
+        if self.reason == 'score' or self.reason == 'limit':
+            margin = '{0:g}'.format(abs(self.score))
+        elif self.reason == 'captures':
+            margin = '{0:g}'.format(abs(self.score + self.komi))
+        else:
+            margin = {'resign': 'R', 'illegal': 'F'}[self.reason]
+        return '{0}+{1}'.format('B' if self.winner == BLACK else 'W', margin)
+
+    def to_bytes(self):
+        data = [HEADER.pack(MAGIC, VERSION, self.rows, self.cols,
+                            int(self.suicide_allowed), self.num_caps,
+                            self.komi, WINNER_CODES[self.winner],
+                            REASONS.index(self.reason), self.score,
+                            len(self.moves))]
+        for color, move in self.moves:
+            code = PASS_CODE if move == PASS else move[0]*self.cols + move[1]
+            if color == WHITE:
+                code |= WHITE_BIT
+            data.append(MOVE.pack(code))
+        return b''.join(data)
+
+    @classmethod
+    def from_bytes(cls, data, offset=0):
+        '''Decode the record at offset and return it with the offset after it.'''
+        (magic, version, rows, cols, suicide_allowed, num_caps, komi, winner,
+         reason, score, num_moves) = HEADER.unpack_from(data, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('no game record at offset {0}'.format(offset))
+        record = cls(rows, cols, komi, bool(suicide_allowed), num_caps)
+        record.set_result(WINNERS[winner], REASONS[reason], score)
+        offset += HEADER.size
+        for code, in MOVE.iter_unpack(data[offset:offset + 2*num_moves]):
+            color = WHITE if code & WHITE_BIT else BLACK
+            code &= ~WHITE_BIT
+            move = PASS if code == PASS_CODE else divmod(code, cols)
+            record.add_move(color, move)
+        return record, offset + 2*num_moves
+
+    def to_sgf(self):
+        size = str(self.rows) if self.rows == self.cols else \
+               '{0}:{1}'.format(self.cols, self.rows)
+        rules = 'Capture {0}'.format(self.num_caps) if self.num_caps > 0 \
+                else 'Chinese'
+        nodes = ['(;GM[1]FF[4]SZ[{0}]KM[{1:g}]RU[{2}]RE[{3}]'.format(
+                     size, self.komi, rules, self.result())]
+        for color, move in self.moves:
+            nodes.append(';{0}[{1}]'.format('B' if color == BLACK else 'W',
+                                            sgf_point(move, self.rows)))
+        nodes.append(')\n')
+        return ''.join(nodes)
+
+def append_records(path, records):
+    '''Append game records to a file.'''
+    with open(path, 'ab') as f:
+        for record in records:
+            f.write(record.to_bytes())
+
+def read_records(path):
+    '''Return the game records in a file.'''
+    with open(path, 'rb') as f:
+        data = f.read()
+    records = []
+    offset = 0
+    while offset < len(data):
+        record, offset = GameRecord.from_bytes(data, offset)
+        records.append(record)
+    return records
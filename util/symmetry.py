@@ -0,0 +1,108 @@
+from .const import *
+from .zobrist import zobrist_table
+
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+
+class Symmetries:
+    '''Rotations and reflections of one board size.
+
+    Square boards have 8 symmetries and other boards 4. Symmetry 0 is the
+    identity. maps[t][k] is the index row*cols+col of the image of point k
+    under symmetry t, and inverse[t] is the symmetry that undoes t.
+
+    keys[color][k] packs the Zobrist key of the image of point k under
+    every symmetry into one int, 64 bits per symmetry, so a board can keep
+    the hashes of all its images with a single xor per stone.
+    '''
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        r = rows - 1
+        c = cols - 1
+        images = [lambda i, j: (i, j),
+                  lambda i, j: (r-i, c-j),
+                  lambda i, j: (i, c-j),
+                  lambda i, j: (r-i, j)]
+        if rows == cols:
+            images += [lambda i, j: (j, i),
+                       lambda i, j: (c-j, r-i),
+                       lambda i, j: (j, r-i),
+                       lambda i, j: (c-j, i)]
+        self.count = len(images)
+        self.maps = [[image(i, j)[0]*cols + image(i, j)[1]
+                      for i in range(rows) for j in range(cols)]
+                     for image in images]
+        self.inverse = []
+        for t in range(self.count):
+            for u in range(self.count):
+                if all(self.maps[u][self.maps[t][k]] == k
+                       for k in range(rows*cols)):
+                    self.inverse.append(u)
+                    break
+
+        table = zobrist_table(rows, cols)
+        self.keys = {}
+        for color in (BLACK, WHITE):
+            keys = []
+            for k in range(rows*cols):
+                packed = 0
+                for t in range(self.count):
+                    packed |= table[color][self.maps[t][k]] << (HASH_BITS*t)
+                keys.append(packed)
+            self.keys[color] = keys
+
+    def hashes(self, packed):
+        '''Split a packed symmetry hash into the hash of each image.'''
+        return [packed >> (HASH_BITS*t) & HASH_MASK
+                for t in range(self.count)]
+
+    def fixing(self, packed):
+        '''Symmetries, other than the identity, that map the position to itself.'''
+        hashes = self.hashes(packed)
+        return [t for t in range(1, self.count) if hashes[t] == hashes[0]]
+
+    def canonical(self, packed):
+        '''Return (hash, t): the smallest image hash and its symmetry.'''
+        hashes = self.hashes(packed)
+        t = min(range(self.count), key=hashes.__getitem__)
+        return hashes[t], t
+
+    def transform(self, move, t):
+        '''Return the image of a move under symmetry t.'''
+        if move == PASS or move == RESIGN:
+            return move
+        k = self.maps[t][move[0]*self.cols + move[1]]
+        return divmod(k, self.cols)
+
+    def untransform(self, move, t):
+        '''Return the move whose image under symmetry t is move.'''
+        return self.transform(move, self.inverse[t])
+
+    def unique_moves(self, moves, fixing):
+        '''Keep one move of each orbit under the symmetries in fixing.
+
+        The symmetries map the position to itself, so equivalent moves lead
+        to equivalent positions. The first move of each orbit is kept.
+        '''
+        if not fixing:
+            return list(moves)
+        seen = set()
+        result = []
+        for move in moves:
+            if move in seen:
+                continue
+            result.append(move)
+            seen.add(move)
+            for t in fixing:
+                seen.add(self.transform(move, t))
+        return result
+
+_SYMMETRIES = {}
+
+def symmetries(rows, cols):
+    '''Return the symmetries of the given board size.'''
+    key = (rows, cols)
+    if key not in _SYMMETRIES:
+        _SYMMETRIES[key] = Symmetries(rows, cols)
+    return _SYMMETRIES[key]
@@ -0,0 +1,21 @@
+import random
+
+from .const import *
+
+_TABLES = {}
+
+def zobrist_table(rows, cols):
+    '''Return the Zobrist keys for the given board size.
+
+    The result maps BLACK and WHITE to lists of 64-bit keys indexed by
+    row*cols+col. Keys are generated from a fixed seed, so every board of
+    the same size, in any process, hashes positions identically.
+    '''
+    key = (rows, cols)
+    if key not in _TABLES:
+        rng = random.Random('zobrist-{0}x{1}'.format(rows, cols))
+        _TABLES[key] = {
+            BLACK: [rng.getrandbits(64) for i in range(rows*cols)],
+            WHITE: [rng.getrandbits(64) for i in range(rows*cols)],
+        }
+    return _TABLES[key]